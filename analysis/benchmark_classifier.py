@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark the form field line classifier
+Times the original per-line classifier against the precompiled single-scan
+classifier in extract_form_fields.py on a directory of PDFs, and checks that
+both produce identical fields
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+from pathlib import Path
+
+from extract_form_fields import (
+    clean_field_name, extract_fields_from_text, extractor_version, iter_page_texts
+)
+from extraction_cache import add_cache_arguments, cache_from_args, file_digest
+
+def legacy_extract_fields_from_text(text, form_number, filename):
+    """The original classifier, kept verbatim as the benchmark baseline"""
+    fields = []
+
+    lines = text.split('\n')
+
+    for i, line in enumerate(lines):
+        line = line.strip()
+
+        # Skip headers and footers
+        if any(skip in line.lower() for skip in ['page', 'form 3', 'energy trust', 'return completed', 'upgrade types']):
+            continue
+
+        # Look for signature fields
+        if 'signature' in line.lower() and len(line) < 100:
+            context = ' '.join(lines[max(0, i-2):min(len(lines), i+3)])
+            fields.append({
+                'field_type': 'Signature',
+                'field_name': clean_field_name(line),
+                'required': '★' in line or 'required' in line.lower(),
+                'context': clean_field_name(context[:200])
+            })
+
+        # Look for text input fields (with underscores or colons)
+        if ('___' in line or ': ' in line) and len(line) < 100:
+            # Extract field label
+            label = re.sub(r'[_:]+.*$', '', line).strip()
+            if label and len(label) > 2:
+                fields.append({
+                    'field_type': 'Text Input',
+                    'field_name': clean_field_name(label),
+                    'required': '★' in line or '⭐' in line,
+                    'context': clean_field_name(line[:200])
+                })
+
+        # Look for checkbox/radio options
+        checkbox_match = re.search(r'☐\s*([A-Z][A-Za-z\s,/\-()]+?)(?:\s*☐|\s*$)', line)
+        if checkbox_match:
+            fields.append({
+                'field_type': 'Checkbox',
+                'field_name': clean_field_name(checkbox_match.group(1)),
+                'required': False,
+                'context': clean_field_name(line[:200])
+            })
+
+    # Add document reference and filename to each field
+    for field in fields:
+        field['form_number'] = form_number
+        field['document'] = filename
+
+    return fields
+
+def load_corpus(pdf_dir, cache=None):
+    """Return the newline-joined page text of every readable PDF in pdf_dir"""
+    texts = []
+    for pdf_path in sorted(Path(pdf_dir).glob('*.pdf')):
+        entry = None
+        if cache is not None:
+            key = cache.key(file_digest(pdf_path), extractor_version())
+            entry = cache.get(key)
+
+        if entry is not None:
+            pages = entry['pages']
+        else:
+            try:
+                pages = list(iter_page_texts(pdf_path))
+            except Exception as e:
+                print(f"  Skipping {pdf_path.name}: {e}", file=sys.stderr)
+                continue
+            if cache is not None:
+                cache.put(key, {'extractor': extractor_version(), 'pages': pages})
+
+        texts.append(''.join(text + '\n' for text in pages))
+    return texts
+
+def time_classifier(classify, texts, repeat):
+    """Return the best wall time over repeat passes of classify over all texts"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            classify(text, 'BENCH', 'bench.pdf')
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the form field line classifier")
+    parser.add_argument("pdf_dir", nargs="?", default=os.getcwd(),
+                        help="Directory of PDFs to use as the corpus (default: current directory)")
+    parser.add_argument("-r", "--repeat", type=int, default=5,
+                        help="Timed passes per classifier; the best is reported (default: 5)")
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+
+    texts = load_corpus(args.pdf_dir, cache_from_args(args))
+    line_count = sum(text.count('\n') + 1 for text in texts)
+    print(f"Corpus: {len(texts)} documents, {line_count} lines")
+
+    for text in texts:
+        if legacy_extract_fields_from_text(text, 'BENCH', 'bench.pdf') != extract_fields_from_text(text, 'BENCH', 'bench.pdf'):
+            print("✗ Classifiers disagree; benchmark aborted", file=sys.stderr)
+            sys.exit(1)
+    print("✓ Both classifiers produce identical fields")
+
+    before = time_classifier(legacy_extract_fields_from_text, texts, args.repeat)
+    after = time_classifier(extract_fields_from_text, texts, args.repeat)
+
+    print(f"\n  Before (per-line): {line_count / before:>12,.0f} lines/sec")
+    print(f"  After (single scan): {line_count / after:>10,.0f} lines/sec")
+    print(f"  Speedup: {before / after:.2f}x")
+
+if __name__ == "__main__":
+    main()
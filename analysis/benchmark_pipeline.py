@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Benchmark the extraction pipeline stage by stage
+Times PDF parsing, line classification, deduplication, enhancement and CSV
+writing on a directory of PDFs or on a synthetic corpus of CPF-style forms,
+reporting pages/sec, rows/sec and peak RSS per stage. Results can be saved as
+a JSON baseline and later runs compared against it, so a change to any stage
+shows up as a regression in that stage's throughput.
+
+Synthetic PDFs are written directly (no PDF library needed) with a ToUnicode
+map, so ★ required markers, ☐ checkboxes and Spanish accents come back out of
+PyPDF2 exactly as generated. The same seed always gives the same corpus.
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; peak RSS is reported as null there
+    resource = None
+
+from extract_form_fields import (
+    RAW_FIELDNAMES, deduplicate_fields, extract_form_number, iter_fields, iter_marked_lines,
+    iter_page_texts
+)
+from enhance_form_fields import ENHANCED_FIELDNAMES, enhance_row, normalize_field_name
+
+BASELINE_VERSION = 1
+DEFAULT_TOLERANCE = 0.10
+
+STAGES = ['parse', 'classify', 'dedup', 'enhance', 'csv_write']
+
+# Form numbers and languages drawn for synthetic documents
+SYNTHETIC_FORMS = ['300CPF', '320C-HVAC', '320C-WH', '320C-WX', '320CPF', '320ECHP', '350CC', '371CPF']
+
+SYNTHETIC_TEXT = {
+    'en': {
+        'title': 'Community Partner Funding {form} Application',
+        'fields': [
+            'Customer Name', 'Customer email address', 'Site Address', 'Mailing Address', 'City',
+            'ZIP', 'Phone', 'Utility account number', 'Contractor company', 'OCCB# or Washington License #',
+            'Install date', 'Invoice total', 'Incentive amount', 'Equipment model number',
+            'Serial number', 'Square footage', 'Year built', 'Household size', 'Annual gross income',
+            'Project address', 'Heating fuel type', 'Number of stories',
+        ],
+        'checkboxes': [
+            ['Ductless Heat Pump', 'Ducted Heat Pump', 'Gas Furnace'],
+            ['Attic Insulation', 'Floor Insulation', 'Wall Insulation'],
+            ['Homeowner', 'Renter', 'Landlord'],
+            ['Heat Pump Water Heater', 'Gas Tankless Water Heater'],
+            ['Electric', 'Natural Gas', 'Propane', 'Other'],
+        ],
+        'signatures': ['Customer Signature', 'Contractor Signature', 'Property Owner Signature'],
+        'date': 'Date',
+        'prose': [
+            'Eligible systems must be installed by a participating contractor.',
+            'Incentives are subject to funding availability and program requirements.',
+            'Submit this application within 90 days of installation.',
+            'The customer agrees to allow verification of the installed equipment.',
+            'Incomplete applications may delay incentive payment.',
+            'Equipment must meet the efficiency requirements listed in the program guide.',
+            'Attach a copy of the final invoice showing equipment and labor costs.',
+        ],
+        'footer': 'Page {page} of {pages}',
+    },
+    'es': {
+        'title': 'Solicitud de Financiación Comunitaria {form}',
+        'fields': [
+            'Nombre del cliente', 'Correo electrónico del cliente', 'Dirección del sitio',
+            'Dirección postal', 'Ciudad', 'Código postal', 'Teléfono', 'Número de cuenta de servicios',
+            'Empresa contratista', 'Fecha de instalación', 'Total de la factura', 'Monto del incentivo',
+            'Número de modelo del equipo', 'Número de serie', 'Pies cuadrados', 'Año de construcción',
+            'Tamaño del hogar', 'Ingreso bruto anual', 'Tipo de combustible de calefacción',
+        ],
+        'checkboxes': [
+            ['Bomba de calor sin ductos', 'Bomba de calor con ductos', 'Horno de gas'],
+            ['Aislamiento del ático', 'Aislamiento del piso', 'Aislamiento de pared'],
+            ['Propietario', 'Inquilino', 'Arrendador'],
+            ['Electricidad', 'Gas natural', 'Propano', 'Otro'],
+        ],
+        'signatures': ['Firma del cliente', 'Firma del contratista', 'Firma del propietario'],
+        'date': 'Fecha',
+        'prose': [
+            'Los sistemas elegibles deben ser instalados por un contratista participante.',
+            'Los incentivos están sujetos a la disponibilidad de fondos.',
+            'Envíe esta solicitud dentro de los 90 días posteriores a la instalación.',
+            'El cliente acepta permitir la verificación del equipo instalado.',
+            '¿Tiene preguntas? Llame a nuestro equipo de servicio al cliente.',
+            'Adjunte una copia de la factura final con los costos del equipo.',
+        ],
+        'footer': 'Página {page} de {pages}',
+    },
+}
+
+def synthesize_page(rng, language, form_number, page, pages, lines_per_page=40):
+    """Return the text lines of one synthetic form page"""
+    text = SYNTHETIC_TEXT[language]
+    lines = [text['title'].format(form=form_number)]
+    while len(lines) < lines_per_page - 1:
+        kind = rng.random()
+        if kind < 0.40:
+            lines.append(rng.choice(text['prose']))
+        elif kind < 0.70:
+            label = rng.choice(text['fields'])
+            if rng.random() < 0.35:
+                # Numbered variants ('Serial number 12') keep the unique field count
+                # growing with the corpus, so later stages have real work
+                label = f"{label} {rng.randint(1, 99)}"
+            star = '★ ' if rng.random() < 0.3 else ''
+            if rng.random() < 0.5:
+                lines.append(f"{star}{label}: {'_' * rng.randint(8, 30)}")
+            else:
+                lines.append(f"{star}{label} {'_' * rng.randint(8, 30)}")
+        elif kind < 0.88:
+            options = rng.choice(text['checkboxes'])
+            lines.append(' '.join(f"☐ {option}" for option in options))
+        else:
+            star = '★ ' if rng.random() < 0.5 else ''
+            lines.append(f"{star}{rng.choice(text['signatures'])} {'_' * 20} {text['date']} {'_' * 10}")
+    lines.append(text['footer'].format(page=page, pages=pages))
+    return lines
+
+# Codes for the characters outside WinAnsiEncoding that the forms use
+_SPECIAL_CODES = {'★': 0x80, '☐': 0x81}
+
+def _to_unicode_cmap():
+    pairs = [(0x80, 0x2605), (0x81, 0x2610)] + [(code, ord(bytes([code]).decode('cp1252'))) for code in range(0xA1, 0x100)]
+    lines = [
+        '/CIDInit /ProcSet findresource begin', '12 dict begin', 'begincmap',
+        '/CMapName /CPF-Synthetic def', '/CMapType 2 def',
+        '1 begincodespacerange <00> <FF> endcodespacerange',
+        '1 beginbfrange <20> <7E> <0020> endbfrange',
+        f'{len(pairs)} beginbfchar',
+        *(f'<{code:02X}> <{unicode:04X}>' for code, unicode in pairs),
+        'endbfchar', 'endcmap', 'CMapName currentdict /CMap defineresource pop', 'end', 'end',
+    ]
+    return '\n'.join(lines).encode('ascii')
+
+def _pdf_string(text):
+    encoded = bytearray()
+    for char in text:
+        code = _SPECIAL_CODES.get(char)
+        encoded.extend([code] if code is not None else char.encode('cp1252'))
+    return b'(' + bytes(encoded).replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+def _stream(data):
+    return b'<< /Length %d >>\nstream\n' % len(data) + data + b'\nendstream'
+
+def write_synthetic_pdf(path, pages):
+    """Write a minimal PDF with one line of Helvetica text per item of each page's lines"""
+    objects = []
+
+    def add(data):
+        objects.append(data)
+        return len(objects)
+
+    cmap_id = add(_stream(_to_unicode_cmap()))
+    font_id = add(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica '
+                  b'/Encoding /WinAnsiEncoding /ToUnicode %d 0 R >>' % cmap_id)
+    content_ids = [
+        add(_stream(b'BT /F1 9 Tf 11 TL 36 760 Td\n' + b''.join(_pdf_string(line) + b' Tj T*\n' for line in lines) + b'ET'))
+        for lines in pages
+    ]
+    # Page objects come next, then the page tree they point back to
+    pages_id = len(objects) + len(pages) + 1
+    page_ids = [
+        add(b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] '
+            b'/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>' % (pages_id, font_id, content_id))
+        for content_id in content_ids
+    ]
+    add(b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(b'%d 0 R' % i for i in page_ids), len(page_ids)))
+    catalog_id = add(b'<< /Type /Catalog /Pages %d 0 R >>' % pages_id)
+
+    out = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = []
+    for number, data in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + data + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, catalog_id, xref)
+    with open(path, 'wb') as f:
+        f.write(out)
+
+def synthesize_corpus(out_dir, documents, pages_per_document=20, spanish_share=0.3, seed=0):
+    """Write a deterministic corpus of synthetic CPF forms, returning their paths"""
+    rng = random.Random(seed)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(documents):
+        language = 'es' if rng.random() < spanish_share else 'en'
+        form_number = rng.choice(SYNTHETIC_FORMS) + ('-ES' if language == 'es' else '')
+        pages = [synthesize_page(rng, language, form_number, page, pages_per_document)
+                 for page in range(1, pages_per_document + 1)]
+        path = out_dir / f"{i:05d}_Synthetic Form {form_number} (PDF).pdf"
+        write_synthetic_pdf(path, pages)
+        paths.append(path)
+    return paths
+
+def peak_rss_mb():
+    """Return this process's peak resident set size in MB, or None if unknown"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def run_pipeline(pdf_files, work_dir, fuzzy=0):
+    """Run every stage once, returning ({stage: (seconds, items, peak RSS)}, corpus counts)"""
+    timings = {}
+
+    start = time.perf_counter()
+    documents = []
+    for pdf_path in pdf_files:
+        try:
+            documents.append((pdf_path, list(iter_page_texts(pdf_path))))
+        except Exception as e:
+            print(f"  Skipping {pdf_path.name}: {e}", file=sys.stderr)
+    pages = sum(len(texts) for _, texts in documents)
+    timings['parse'] = (time.perf_counter() - start, pages, peak_rss_mb())
+
+    start = time.perf_counter()
+    fields = []
+    for pdf_path, texts in documents:
+        fields.extend(iter_fields(iter_marked_lines(texts), extract_form_number(pdf_path.name), pdf_path.name))
+    timings['classify'] = (time.perf_counter() - start, len(fields), peak_rss_mb())
+
+    start = time.perf_counter()
+    unique_fields = deduplicate_fields(fields, fuzzy)
+    timings['dedup'] = (time.perf_counter() - start, len(fields), peak_rss_mb())
+
+    # Start from a cold name cache, as a fresh enhancement run would
+    normalize_field_name.cache_clear()
+    start = time.perf_counter()
+    raw_rows = [{name: str(field[name]) for name in RAW_FIELDNAMES}
+                for field in sorted(unique_fields, key=lambda x: (x['form_number'], x['field_name']))]
+    enhanced_rows = [enhance_row(row) for row in raw_rows]
+    timings['enhance'] = (time.perf_counter() - start, len(enhanced_rows), peak_rss_mb())
+
+    start = time.perf_counter()
+    for filename, fieldnames, rows in (('form_fields_comprehensive.csv', RAW_FIELDNAMES, raw_rows),
+                                       ('form_fields_enhanced.csv', ENHANCED_FIELDNAMES, enhanced_rows)):
+        with open(os.path.join(work_dir, filename), 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+    timings['csv_write'] = (time.perf_counter() - start, len(raw_rows) + len(enhanced_rows), peak_rss_mb())
+
+    lines = sum(text.count('\n') + 1 for _, texts in documents for text in texts)
+    corpus = {'documents': len(documents), 'pages': pages, 'lines': lines,
+              'fields': len(fields), 'unique_fields': len(unique_fields)}
+    return timings, corpus
+
+STAGE_UNITS = {'parse': 'pages', 'classify': 'rows', 'dedup': 'rows', 'enhance': 'rows', 'csv_write': 'rows'}
+
+def run_benchmark(pdf_files, repeat=3, fuzzy=0):
+    """Run the pipeline repeat times and return the result dict saved as a baseline"""
+    best = {}
+    peaks = {}
+    corpus = None
+    with tempfile.TemporaryDirectory() as work_dir:
+        for _ in range(repeat):
+            timings, corpus = run_pipeline(pdf_files, work_dir, fuzzy)
+            for stage in STAGES:
+                seconds, items, peak = timings[stage]
+                if stage not in best or seconds < best[stage][0]:
+                    best[stage] = (seconds, items)
+                # Peak RSS only grows, so the first pass shows which stage reaches it
+                peaks.setdefault(stage, peak)
+
+    stages = {}
+    for stage in STAGES:
+        seconds, items = best[stage]
+        stages[stage] = {
+            'seconds': round(seconds, 6),
+            'items': items,
+            'unit': STAGE_UNITS[stage],
+            'per_sec': round(items / seconds, 1) if seconds > 0 else None,
+            'peak_rss_mb': peaks[stage],
+        }
+    return {
+        'version': BASELINE_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'fuzzy': fuzzy,
+        'corpus': corpus,
+        'stages': stages,
+        'total_seconds': round(sum(stage['seconds'] for stage in stages.values()), 6),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+def print_results(results):
+    corpus = results['corpus']
+    print(f"Corpus: {corpus['documents']} documents, {corpus['pages']} pages, {corpus['lines']} lines, "
+          f"{corpus['fields']} fields ({corpus['unique_fields']} unique)")
+    print(f"\n  {'Stage':<10} {'Seconds':>10} {'Throughput':>22} {'Peak RSS':>10}")
+    for stage in STAGES:
+        result = results['stages'][stage]
+        per_sec = f"{result['per_sec']:,.0f} {result['unit']}/sec" if result['per_sec'] else '-'
+        peak = f"{result['peak_rss_mb']:.1f} MB" if result['peak_rss_mb'] is not None else '-'
+        print(f"  {stage:<10} {result['seconds']:>10.3f} {per_sec:>22} {peak:>10}")
+    print(f"  {'total':<10} {results['total_seconds']:>10.3f}")
+
+def compare_results(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Print per-stage throughput changes against a baseline; returns the regressed stages"""
+    if baseline.get('corpus') != results['corpus']:
+        print("⚠ Baseline was recorded on a different corpus; throughput is not directly comparable")
+
+    regressions = []
+    print(f"\n  {'Stage':<10} {'Baseline':>16} {'Current':>16} {'Change':>9}")
+    for stage in STAGES:
+        before = baseline.get('stages', {}).get(stage, {}).get('per_sec')
+        after = results['stages'][stage]['per_sec']
+        if not before or not after:
+            continue
+        change = after / before - 1
+        marker = ''
+        if change < -tolerance:
+            regressions.append(stage)
+            marker = '  ✗ regression'
+        print(f"  {stage:<10} {before:>16,.0f} {after:>16,.0f} {change:>+8.1%}{marker}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark each stage of the form field extraction pipeline")
+    parser.add_argument("pdf_dir", nargs="?", default=os.getcwd(),
+                        help="Directory of PDFs to use as the corpus (default: current directory)")
+    parser.add_argument("--synthesize", type=int, metavar="DOCS",
+                        help="Benchmark a synthetic corpus of DOCS generated forms instead of pdf_dir")
+    parser.add_argument("--pages-per-doc", type=int, default=20,
+                        help="Pages per synthetic document (default: 20)")
+    parser.add_argument("--spanish", type=float, default=0.3,
+                        help="Share of synthetic documents in Spanish (default: 0.3)")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic corpus seed (default: 0)")
+    parser.add_argument("--corpus-dir", metavar="DIR",
+                        help="Keep the synthetic PDFs here instead of in a temporary directory")
+    parser.add_argument("--fuzzy", type=float, default=0, metavar="THRESHOLD",
+                        help="Benchmark fuzzy deduplication at this threshold (default: 0, exact only)")
+    parser.add_argument("-r", "--repeat", type=int, default=3,
+                        help="Timed passes over the corpus; the best time per stage is reported (default: 3)")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Write the results to this JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against a baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"Throughput drop that counts as a regression (default: {DEFAULT_TOLERANCE})")
+    args = parser.parse_args()
+
+    corpus_dir = None
+    if args.synthesize:
+        corpus_dir = args.corpus_dir or tempfile.mkdtemp(prefix='cpf-bench-')
+        pdf_files = synthesize_corpus(corpus_dir, args.synthesize, args.pages_per_doc, args.spanish, args.seed)
+        print(f"✓ Synthesized {len(pdf_files)} documents in {corpus_dir}")
+    else:
+        pdf_files = sorted(Path(args.pdf_dir).glob('*.pdf'))
+
+    try:
+        results = run_benchmark(pdf_files, args.repeat, args.fuzzy)
+    finally:
+        if corpus_dir is not None and not args.corpus_dir:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    if args.synthesize:
+        results['corpus'].update(synthetic={'documents': args.synthesize, 'pages_per_doc': args.pages_per_doc,
+                                            'spanish': args.spanish, 'seed': args.seed})
+    print_results(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Baseline saved: {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n✗ Slower than baseline beyond {args.tolerance:.0%}: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+        print(f"\n✓ No stage slower than baseline beyond {args.tolerance:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Importable CPF extraction library
+One module for the field extractor (extract_form_fields.py), the field
+enhancer (enhance_form_fields.py) and the fabric text pipeline
+(pdf_fabric_processor.py), so scripts and long-lived workers can import it
+once instead of exec()-ing the scripts. PyPDF2 and pypdf are only imported
+when the first PDF is read, and the fabric pipeline only when one of its
+names is first used, which keeps importing this module cheap and lets the
+field functions work without pdf_fabric_processor.py.
+"""
+
+import sys
+import importlib
+from pathlib import Path
+
+from extraction_cache import ExtractionCache, add_cache_arguments, cache_from_args, file_digest
+from extract_form_fields import (
+    FIELD_PARSER_VERSION, RAW_FIELDNAMES, NearDuplicateIndex, add_dedup_arguments,
+    deduplicate_fields, extract_all_forms, extract_documents, extract_fields_from_text,
+    extract_form_number, extractor_version, iter_all_fields, iter_fields, iter_marked_lines,
+    iter_page_texts, iter_unique_fields, write_merge_report
+)
+from enhance_form_fields import (
+    ENHANCED_FIELDNAMES, ENHANCER_VERSION, classify_field, enhance_csv, enhance_row,
+    normalize_field_name, print_enhancement_stats, write_enhanced_csv
+)
+from page_texts import PageTexts, build_page_texts
+from pdf_input import DocumentError
+from run_metrics import (
+    NULL_METRICS, Metrics, NullMetrics, add_metrics_arguments, finish_metrics, metrics_from_args
+)
+
+# Loaded from pdf_fabric_processor.py (at the repository root) on first use
+_FABRIC_NAMES = {
+    'DocumentJournal', 'FabricError', 'FabricJournal', 'FabricRunner', 'FabricServer', 'PageExtractor',
+    'aggregate_results', 'estimate_tokens', 'extract_pdf_text', 'iter_chunks', 'iter_pdf_text',
+    'process_batch', 'process_pdf_with_fabric'
+}
+
+def __getattr__(name):
+    if name not in _FABRIC_NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    repo_root = str(Path(__file__).resolve().parent.parent)
+    if repo_root not in sys.path:
+        sys.path.append(repo_root)
+    value = getattr(importlib.import_module('pdf_fabric_processor'), name)
+    # Later lookups find it directly
+    globals()[name] = value
+    return value
+
+def extract_pdf_fields(pdf_path, lazy=False):
+    """
+    Return the raw fields of a single PDF
+    Unlike extract_documents, nothing is printed and a PDF that can't be
+    read raises DocumentError instead of being skipped.
+    """
+    pdf_path = Path(pdf_path)
+    try:
+        return list(iter_fields(iter_marked_lines(iter_page_texts(pdf_path, lazy)),
+                                extract_form_number(pdf_path.name), pdf_path.name))
+    except Exception as e:
+        raise DocumentError(f"Error reading PDF: {e}")
+
+def enhance_fields(fields):
+    """Return enhanced rows for raw fields, exactly as enhance_csv would write them"""
+    # Enhance rows as they would read back from the raw CSV
+    return [enhance_row({name: str(field[name]) for name in RAW_FIELDNAMES}) for field in fields]
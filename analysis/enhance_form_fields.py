@@ -8,7 +8,33 @@ import csv
 import re
 import hashlib
 from collections import defaultdict
+from functools import lru_cache
+from contextlib import contextmanager
+from run_metrics import NULL_METRICS
 
+# Bump whenever the enhancement rules change, so incremental rebuilds
+# re-enhance rows they would otherwise reuse
+ENHANCER_VERSION = 1
+
+ENHANCED_FIELDNAMES = [
+    'field_id',
+    'form_id', 
+    'form_number',
+    'field_category',
+    'field_name',
+    'normalized_name',
+    'data_type',
+    'field_type',
+    'required',
+    'validation_rules',
+    'language',
+    'context',
+    'document_source'
+]
+
+# Field names repeat across documents and applications; each distinct name is
+# only normalized once
+@lru_cache(maxsize=65536)
 def normalize_field_name(field_name):
     """Create a normalized field name for matching across forms"""
     # Remove numbers, punctuation, convert to lowercase
@@ -45,131 +71,209 @@ def normalize_field_name(field_name):
     
     return normalized[:50]  # Limit length
 
-def categorize_field(field_name, context):
-    """Categorize field into logical groups"""
-    name_lower = field_name.lower()
-    context_lower = context.lower()
-    
+class KeywordMatcher:
+    """
+    Multi-keyword substring matcher compiled into a single trie-shaped regex
+    Each keyword carries a set of tags; tags(text) returns the union of the
+    tags of every keyword occurring anywhere in text, found in one scan.
+    """
+
+    def __init__(self, keyword_tags):
+        self.keyword_tags = {}
+        for keyword, tags in keyword_tags.items():
+            self.keyword_tags.setdefault(keyword, set()).update(tags)
+        
+        # The scan reports the longest keyword starting at each position; any
+        # shorter keyword starting there is a prefix of it, so fold those in
+        self.match_tags = {}
+        for keyword in self.keyword_tags:
+            tags = set()
+            for end in range(1, len(keyword) + 1):
+                tags.update(self.keyword_tags.get(keyword[:end], ()))
+            self.match_tags[keyword] = frozenset(tags)
+        
+        self.pattern = re.compile('(?=(' + self._trie_pattern(self.keyword_tags) + '))')
+
+    @staticmethod
+    def _trie_pattern(keywords):
+        trie = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = {}
+        
+        def build(node):
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ''
+            body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+            # Greedy optional suffix, so the longest keyword wins at each position
+            return '(?:' + body + ')?' if '' in node else body
+        
+        return build(trie)
+
+    def tags(self, text):
+        """Return the set of tags for all keywords found in text"""
+        found = set()
+        for match in self.pattern.finditer(text):
+            found |= self.match_tags[match.group(1)]
+        return found
+
+# Category rules in priority order: the first category with a keyword in the
+# lowercased field name wins. Numbered process steps are checked between the
+# two groups.
+CATEGORY_RULES = [
     # Customer Information - check signatures first
-    if any(x in name_lower for x in ['customer signature', 'customer name and signature', 'firma del cliente']):
-        return 'customer_authorization'
-    
+    ('customer_authorization', ['customer signature', 'customer name and signature', 'firma del cliente']),
     # Contractor signatures
-    if any(x in name_lower for x in ['contractor signature', 'contractor name and signature', 'firma del contratista']):
-        return 'contractor_authorization'
-    
+    ('contractor_authorization', ['contractor signature', 'contractor name and signature', 'firma del contratista']),
     # Customer Information (non-signature)
-    if any(x in name_lower for x in ['customer', 'homeowner', 'renter', 'cliente', 'propietario']):
-        if 'type' in name_lower or 'tipo' in name_lower:
-            return 'customer_information'
-        return 'customer_information'
-    
+    ('customer_information', ['customer', 'homeowner', 'renter', 'cliente', 'propietario']),
     # Contractor Information (non-signature)
-    if any(x in name_lower for x in ['contractor', 'company', 'occb', 'license', 'contratista', 'empresa']):
-        return 'contractor_information'
-    
+    ('contractor_information', ['contractor', 'company', 'occb', 'license', 'contratista', 'empresa']),
     # Site/Property Information
-    if any(x in name_lower for x in ['site address', 'mailing address', 'dirección', 'city', 'state', 'zip',
-                                      'ciudad', 'estado', 'year built', 'año', 'square feet', 'pies cuadrados',
-                                      'foundation', 'basement', 'cimientos', 'sótano', 'stories', 'pisos']):
-        return 'site_information'
-    
+    ('site_information', ['site address', 'mailing address', 'dirección', 'city', 'state', 'zip',
+                          'ciudad', 'estado', 'year built', 'año', 'square feet', 'pies cuadrados',
+                          'foundation', 'basement', 'cimientos', 'sótano', 'stories', 'pisos']),
     # Equipment/Upgrade Types
-    if any(x in name_lower for x in ['heat pump', 'bomba de calor', 'furnace', 'horno', 'thermostat', 'termostato',
-                                      'water heater', 'calentador de agua', 'insulation', 'aislamiento', 
-                                      'windows', 'ventanas', 'fireplace', 'chiminea', 'air conditioner',
-                                      'aire acondicionado', 'weatherization', 'impermeabilización']):
-        return 'equipment_information'
-    
+    ('equipment_information', ['heat pump', 'bomba de calor', 'furnace', 'horno', 'thermostat', 'termostato',
+                               'water heater', 'calentador de agua', 'insulation', 'aislamiento', 
+                               'windows', 'ventanas', 'fireplace', 'chiminea', 'air conditioner',
+                               'aire acondicionado', 'weatherization', 'impermeabilización']),
     # Technical Specifications
-    if any(x in name_lower for x in ['hspf', 'afue', 'seer', 'eer', 'btu', 'capacity', 'capacidad',
-                                      'model', 'modelo', 'manufacturer', 'fabricante', 'serial']):
-        return 'technical_specifications'
-    
+    ('technical_specifications', ['hspf', 'afue', 'seer', 'eer', 'btu', 'capacity', 'capacidad',
+                                  'model', 'modelo', 'manufacturer', 'fabricante', 'serial']),
     # Financial/Incentive
-    if any(x in name_lower for x in ['incentive', 'incentivo', 'cost', 'costo', 'price', 'precio', 
-                                      'payment', 'pago', 'invoice', 'factura', 'funding', 'financiación',
-                                      'instant', 'discount', 'descuento', 'income', 'ingreso']):
-        return 'financial_information'
-    
-    # Program/Process Steps
-    if name_lower.startswith(('1.', '2.', '3.', '4.', '5.', '6.', '7.', '8.', '9.')):
-        if any(x in name_lower for x in ['review', 'complete', 'sign', 'submit']):
+    ('financial_information', ['incentive', 'incentivo', 'cost', 'costo', 'price', 'precio', 
+                               'payment', 'pago', 'invoice', 'factura', 'funding', 'financiación',
+                               'instant', 'discount', 'descuento', 'income', 'ingreso']),
+]
+
+# Program/Process Steps
+PROCESS_STEP_PREFIXES = ('1.', '2.', '3.', '4.', '5.', '6.', '7.', '8.', '9.')
+PROCESS_STEP_KEYWORDS = ['review', 'complete', 'sign', 'submit']
+
+LATE_CATEGORY_RULES = [
+    # Terms and Conditions
+    ('terms_and_conditions', ['terms', 'conditions', 'eligibility', 'elegibilidad',
+                              'authorization', 'autorización', 'disclaimer', 'exoneración',
+                              'liability', 'responsabilidad', 'property rights', 'derechos']),
+    # Demographics (Optional)
+    ('demographic_information', ['demographic', 'demográfico', 'gender', 'género', 'race', 'raza',
+                                 'language', 'idioma', 'residents', 'residentes', 'household']),
+    # Utility/Energy Provider Info
+    ('utility_information', ['electric provider', 'gas provider', 'proveedor', 'utility', 'servicio']),
+]
+
+# Data type rules in priority order; 'currency' also requires '$' in the
+# context and 'state' also matches a field named exactly 'state'
+DATA_TYPE_RULES = [
+    ('email', ['email', 'e-mail']),
+    ('phone', ['phone', 'telephone', 'tel', 'fax']),
+    ('date', ['date', 'year built', 'install date']),
+    ('currency', ['cost', 'price', 'incentive', 'payment', 'income', 'funding']),
+    ('number', ['hspf', 'afue', 'seer', 'eer', 'btu', 'capacity', 'qty', 
+                'quantity', 'square feet', 'sq ft', 'temperature']),
+    ('percentage', ['%', 'percent', 'fe']),
+    ('address', ['address']),
+    ('zipcode', ['zip']),
+    ('state', ['estado']),
+]
+
+# Field names containing any of these are Spanish
+SPANISH_FIELD_KEYWORDS = ['cliente', 'contratista', 'bomba de calor', 
+                          'calentador', 'aislamiento', 'ventanas',
+                          'firma', 'dirección', 'nombre', 'fecha',
+                          'costo', 'instalado', 'incentivo', 'año',
+                          'empresa', 'elegibilidad', 'autorización',
+                          'proveedor', 'sótano', 'pies cuadrados',
+                          'termostato', 'calefacción', 'vivienda']
+SPANISH_DOCUMENT_KEYWORDS = ['-es', 'espanol', 'spanish', '_es.pdf']
+
+def _build_field_matcher():
+    keyword_tags = {}
+    for category, keywords in CATEGORY_RULES + LATE_CATEGORY_RULES:
+        for keyword in keywords:
+            keyword_tags.setdefault(keyword, set()).add(('category', category))
+    for keyword in PROCESS_STEP_KEYWORDS:
+        keyword_tags.setdefault(keyword, set()).add(('process_step', None))
+    for data_type, keywords in DATA_TYPE_RULES:
+        for keyword in keywords:
+            keyword_tags.setdefault(keyword, set()).add(('data_type', data_type))
+    for keyword in SPANISH_FIELD_KEYWORDS:
+        keyword_tags.setdefault(keyword, set()).add(('language', 'es'))
+    return KeywordMatcher(keyword_tags)
+
+# Built once at import; one scan of a field name yields every tag needed for
+# its category, data type and language
+FIELD_MATCHER = _build_field_matcher()
+
+def _category_from_tags(name_lower, tags):
+    for category, _ in CATEGORY_RULES:
+        if ('category', category) in tags:
+            return category
+    
+    if name_lower.startswith(PROCESS_STEP_PREFIXES):
+        if ('process_step', None) in tags:
             return 'process_instructions'
         # Otherwise it's likely an equipment/upgrade recommendation
         return 'equipment_information'
     
-    # Terms and Conditions
-    if any(x in name_lower for x in ['terms', 'conditions', 'eligibility', 'elegibilidad',
-                                      'authorization', 'autorización', 'disclaimer', 'exoneración',
-                                      'liability', 'responsabilidad', 'property rights', 'derechos']):
-        return 'terms_and_conditions'
-    
-    # Demographics (Optional)
-    if any(x in name_lower for x in ['demographic', 'demográfico', 'gender', 'género', 'race', 'raza',
-                                      'language', 'idioma', 'residents', 'residentes', 'household']):
-        return 'demographic_information'
-    
-    # Utility/Energy Provider Info
-    if any(x in name_lower for x in ['electric provider', 'gas provider', 'proveedor', 'utility', 'servicio']):
-        return 'utility_information'
+    for category, _ in LATE_CATEGORY_RULES:
+        if ('category', category) in tags:
+            return category
     
     return 'other'
 
-def infer_data_type(field_name, field_type, context):
-    """Infer the data type for the field"""
-    name_lower = field_name.lower()
-    
+def _data_type_from_tags(name_lower, field_type, context, tags):
     if field_type == 'Signature':
         return 'signature'
     
     if field_type == 'Checkbox':
         return 'boolean'
     
-    # Email
-    if 'email' in name_lower or 'e-mail' in name_lower:
-        return 'email'
-    
-    # Phone
-    if any(x in name_lower for x in ['phone', 'telephone', 'tel', 'fax']):
-        return 'phone'
-    
-    # Date
-    if any(x in name_lower for x in ['date', 'year built', 'install date']):
-        return 'date'
-    
-    # Currency/Money
-    if any(x in name_lower for x in ['cost', 'price', 'incentive', 'payment', 'income', 'funding']):
-        if '$' in context:
-            return 'currency'
-    
-    # Numeric measurements
-    if any(x in name_lower for x in ['hspf', 'afue', 'seer', 'eer', 'btu', 'capacity', 'qty', 
-                                      'quantity', 'square feet', 'sq ft', 'temperature']):
-        return 'number'
-    
-    # Percentage
-    if '%' in name_lower or 'percent' in name_lower or 'fe' in name_lower:
-        return 'percentage'
-    
-    # Address
-    if 'address' in name_lower:
-        return 'address'
-    
-    # Zip code
-    if 'zip' in name_lower:
-        return 'zipcode'
+    for data_type, _ in DATA_TYPE_RULES:
+        if data_type == 'currency':
+            if ('data_type', 'currency') in tags and '$' in context:
+                return 'currency'
+        elif data_type == 'state':
+            if name_lower == 'state' or ('data_type', 'state') in tags:
+                return 'state'
+        elif ('data_type', data_type) in tags:
+            return data_type
+    
+    # Default to text (including model/serial/license numbers)
+    return 'text'
+
+@lru_cache(maxsize=None)
+def _is_spanish_document(document):
+    document_lower = document.lower()
+    return any(x in document_lower for x in SPANISH_DOCUMENT_KEYWORDS)
+
+def classify_field(field_name, field_type, context, document):
+    """Return (category, data_type, language) from a single keyword scan of the field name"""
+    name_lower = field_name.lower()
+    tags = FIELD_MATCHER.tags(name_lower)
     
-    # State
-    if name_lower == 'state' or 'estado' in name_lower:
-        return 'state'
+    category = _category_from_tags(name_lower, tags)
+    data_type = _data_type_from_tags(name_lower, field_type, context, tags)
     
-    # Model/Serial numbers
-    if any(x in name_lower for x in ['model', 'serial', 'license', 'occb', 'certificate']):
-        return 'text'
+    # Determine language - check both document name and field content
+    is_spanish = _is_spanish_document(document) or ('language', 'es') in tags
+    language = 'es' if is_spanish else 'en'
     
-    # Default to text
-    return 'text'
+    return category, data_type, language
+
+def categorize_field(field_name, context):
+    """Categorize field into logical groups"""
+    name_lower = field_name.lower()
+    return _category_from_tags(name_lower, FIELD_MATCHER.tags(name_lower))
+
+def infer_data_type(field_name, field_type, context):
+    """Infer the data type for the field"""
+    name_lower = field_name.lower()
+    return _data_type_from_tags(name_lower, field_type, context, FIELD_MATCHER.tags(name_lower))
 
 def extract_validation_rules(field_name, data_type, required, context):
     """Extract validation rules based on field characteristics"""
@@ -260,116 +364,140 @@ def create_field_id(normalized_name, form_id, category):
     prefix = category_prefixes.get(category, 'MISC')
     return f"{prefix}_{short_hash}_{normalized_name[:20]}"
 
-def enhance_csv(input_file, output_file):
-    """Main function to enhance the CSV"""
-    
-    print("Reading and enhancing form fields...")
-    
-    enhanced_rows = []
+def enhance_row(row):
+    """Enhance a single raw CSV row (string values, as read by csv.DictReader)"""
+    form_number = row['form_number']
+    field_name = row['field_name']
+    field_type = row['field_type']
+    required = row['required']
+    context = row['context']
+    document = row['document']
+    
+    # Create enhanced fields
+    form_id = create_form_id(form_number)
+    normalized_name = normalize_field_name(field_name)
+    category, data_type, language = classify_field(field_name, field_type, context, document)
+    validation_rules = extract_validation_rules(field_name, data_type, required, context)
+    field_id = create_field_id(normalized_name, form_id, category)
+    
+    return {
+        'field_id': field_id,
+        'form_id': form_id,
+        'form_number': form_number,
+        'field_category': category,
+        'field_name': field_name,
+        'normalized_name': normalized_name,
+        'data_type': data_type,
+        'field_type': field_type,
+        'required': required,
+        'validation_rules': validation_rules or '',
+        'language': language,
+        'context': context,
+        'document_source': document
+    }
+
+@contextmanager
+def _store_loader(store):
+    # Rows go to the store in the same pass as the CSV; without one they are dropped
+    if store is None:
+        yield lambda row: None
+    else:
+        with store.loader() as add:
+            yield add
+
+def write_enhanced_csv(enhanced_rows, output_file, store=None):
+    """Stream enhanced rows to CSV (and a FieldStore, if given), returning per-category/data type/form counts"""
+    stats = {
+        'categories': defaultdict(int),
+        'data_types': defaultdict(int),
+        'forms': defaultdict(int)
+    }
+    total = 0
     
-    with open(input_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        
-        for row in reader:
-            form_number = row['form_number']
-            field_name = row['field_name']
-            field_type = row['field_type']
-            required = row['required']
-            context = row['context']
-            document = row['document']
-            
-            # Create enhanced fields
-            form_id = create_form_id(form_number)
-            normalized_name = normalize_field_name(field_name)
-            category = categorize_field(field_name, context)
-            data_type = infer_data_type(field_name, field_type, context)
-            validation_rules = extract_validation_rules(field_name, data_type, required, context)
-            field_id = create_field_id(normalized_name, form_id, category)
-            
-            # Determine language - check both document name and field content
-            is_spanish = (any(x in document.lower() for x in ['-es', 'espanol', 'spanish', '_es.pdf']) or
-                         any(x in field_name.lower() for x in ['cliente', 'contratista', 'bomba de calor', 
-                                                                 'calentador', 'aislamiento', 'ventanas',
-                                                                 'firma', 'dirección', 'nombre', 'fecha',
-                                                                 'costo', 'instalado', 'incentivo', 'año',
-                                                                 'empresa', 'elegibilidad', 'autorización',
-                                                                 'proveedor', 'sótano', 'pies cuadrados',
-                                                                 'termostato', 'calefacción', 'vivienda']))
-            language = 'es' if is_spanish else 'en'
-            
-            enhanced_row = {
-                'field_id': field_id,
-                'form_id': form_id,
-                'form_number': form_number,
-                'field_category': category,
-                'field_name': field_name,
-                'normalized_name': normalized_name,
-                'data_type': data_type,
-                'field_type': field_type,
-                'required': required,
-                'validation_rules': validation_rules or '',
-                'language': language,
-                'context': context,
-                'document_source': document
-            }
-            
-            enhanced_rows.append(enhanced_row)
-    
-    # Write enhanced CSV
-    fieldnames = [
-        'field_id',
-        'form_id', 
-        'form_number',
-        'field_category',
-        'field_name',
-        'normalized_name',
-        'data_type',
-        'field_type',
-        'required',
-        'validation_rules',
-        'language',
-        'context',
-        'document_source'
-    ]
-    
-    with open(output_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+    with open(output_file, 'w', newline='', encoding='utf-8') as f, _store_loader(store) as add:
+        writer = csv.DictWriter(f, fieldnames=ENHANCED_FIELDNAMES)
         writer.writeheader()
-        writer.writerows(enhanced_rows)
+        for row in enhanced_rows:
+            writer.writerow(row)
+            add(row)
+            stats['categories'][row['field_category']] += 1
+            stats['data_types'][row['data_type']] += 1
+            stats['forms'][row['form_id']] += 1
+            total += 1
     
     print(f"✓ Enhanced CSV created: {output_file}")
-    print(f"  Total fields: {len(enhanced_rows)}")
-    
-    # Print statistics
-    categories = defaultdict(int)
-    data_types = defaultdict(int)
-    forms = defaultdict(int)
-    
-    for row in enhanced_rows:
-        categories[row['field_category']] += 1
-        data_types[row['data_type']] += 1
-        forms[row['form_id']] += 1
+    print(f"  Total fields: {total}")
+    if store is not None:
+        print(f"✓ Field store updated: {store.db_path}")
     
+    return stats
+
+def print_enhancement_stats(stats):
+    """Print the counts returned by write_enhanced_csv"""
     print("\nCategories:")
-    for cat, count in sorted(categories.items(), key=lambda x: x[1], reverse=True):
+    for cat, count in sorted(stats['categories'].items(), key=lambda x: x[1], reverse=True):
         print(f"  {cat}: {count}")
     
     print("\nData Types:")
-    for dtype, count in sorted(data_types.items(), key=lambda x: x[1], reverse=True):
+    for dtype, count in sorted(stats['data_types'].items(), key=lambda x: x[1], reverse=True):
         print(f"  {dtype}: {count}")
     
-    print(f"\nUnique Forms: {len(forms)}")
+    print(f"\nUnique Forms: {len(stats['forms'])}")
+
+def enhance_csv(input_file, output_file, store=None, metrics=NULL_METRICS):
+    """Main function to enhance the CSV"""
+    
+    print("Reading and enhancing form fields...")
+    
+    # Rows stream from reader to writer; only the summary counts are kept
+    with open(input_file, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        rows = (enhance_row(row) for row in metrics.iter_timed('csv_read', reader))
+        with metrics.stage('csv_write'):
+            stats = write_enhanced_csv(metrics.iter_timed('enhance', rows), output_file, store)
+    
+    # Print statistics
+    print_enhancement_stats(stats)
 
 if __name__ == "__main__":
-    import sys
     import os
-    # Allow specifying directory as argument
-    if len(sys.argv) > 1:
-        work_dir = sys.argv[1]
+    import argparse
+    from run_metrics import add_metrics_arguments, finish_metrics, metrics_from_args
+    parser = argparse.ArgumentParser(description="Enhance the extracted form fields CSV")
+    parser.add_argument("work_dir", nargs="?", default=os.getcwd(),
+                        help="Directory containing form_fields_comprehensive.csv (default: current directory)")
+    parser.add_argument("--engine", choices=["rows", "columnar"], default="rows",
+                        help="rows streams one row at a time; columnar derives whole columns "
+                             "at once and needs pandas (default: rows)")
+    parser.add_argument("--db", metavar="PATH",
+                        help="Also load the enhanced fields into an indexed SQLite field store")
+    parser.add_argument("--bundle-dir", metavar="DIR",
+                        help="Also write per-form JSON shards and index.json for the HTML tools")
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    metrics = metrics_from_args(args, 'enhance_form_fields')
+    
+    input_csv = os.path.join(args.work_dir, 'form_fields_comprehensive.csv')
+    output_csv = os.path.join(args.work_dir, 'form_fields_enhanced.csv')
+    
+    store = None
+    if args.db:
+        from field_store import FieldStore
+        store = FieldStore(args.db)
+    
+    if args.engine == "columnar":
+        from enhance_columnar import enhance_csv_columnar
+        with metrics.stage('enhance'):
+            enhance_csv_columnar(input_csv, output_csv, store=store)
     else:
-        work_dir = os.getcwd()
+        enhance_csv(input_csv, output_csv, store, metrics)
+    
+    if store is not None:
+        store.close()
     
-    input_csv = os.path.join(work_dir, 'form_fields_comprehensive.csv')
-    output_csv = os.path.join(work_dir, 'form_fields_enhanced.csv')
+    if args.bundle_dir:
+        from field_bundles import build_bundles_from_csv
+        with metrics.stage('bundles'):
+            build_bundles_from_csv(output_csv, args.bundle_dir)
     
-    enhance_csv(input_csv, output_csv)
+    finish_metrics(metrics, args)
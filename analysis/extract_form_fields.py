@@ -7,8 +7,30 @@ Creates a comprehensive CSV with field names, document references, and context
 import os
 import re
 import csv
+import math
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-import PyPDF2
+from extraction_cache import file_digest, add_cache_arguments, cache_from_args
+from pdf_input import chunk_page_ranges, extract_range, page_count, read_pages
+from run_metrics import NULL_METRICS, add_metrics_arguments, finish_metrics, metrics_from_args
+
+# Cache entries are keyed on extractor_version() and this; bump it whenever
+# extract_fields_from_text changes what it emits
+FIELD_PARSER_VERSION = 1
+
+RAW_FIELDNAMES = ['form_number', 'document', 'field_name', 'field_type', 'required', 'context']
+
+# PyPDF2 is only imported once a PDF is read, so importing this module stays cheap
+def pdf_reader_class():
+    """Return PyPDF2's PdfReader"""
+    import PyPDF2
+    return PyPDF2.PdfReader
+
+def extractor_version():
+    """Return the PDF library and version that cached page texts came from"""
+    import PyPDF2
+    return f"PyPDF2-{PyPDF2.__version__}"
 
 def extract_form_number(filename):
     """Extract form number from filename (e.g., '350CC' from '043_Customer Consent Form–Form 350CC (PDF).pdf')"""
@@ -23,134 +45,449 @@ def extract_form_number(filename):
     
     return "Unknown"
 
+# Line classifier rules, compiled once. A line is skipped if its lowercased
+# text contains any SKIP_KEYWORDS; otherwise it can only yield a field if it
+# contains one of the FIELD_KEYWORDS, so one combined pattern run over a whole
+# page marks the few candidate lines and everything else is never classified.
+SKIP_KEYWORDS = ('page', 'form 3', 'energy trust', 'return completed', 'upgrade types')
+FIELD_KEYWORDS = ('signature', '___', ': ', '☐')
+
+_LINE_RULES = re.compile('|'.join(re.escape(k) for k in SKIP_KEYWORDS + FIELD_KEYWORDS))
+_SKIP_RULE = re.compile('|'.join(re.escape(k) for k in SKIP_KEYWORDS))
+_LABEL_END = re.compile(r'[_:]')
+_CHECKBOX = re.compile(r'☐\s*([A-Z][A-Za-z\s,/\-()]+?)(?:\s*☐|\s*$)')
+_WHITESPACE = re.compile(r'\s+')
+_STARS = re.compile(r'[★⭐]')
+
 def clean_field_name(text):
     """Clean and normalize field names"""
     if not text:
         return ""
     
     # Remove excessive whitespace
-    text = re.sub(r'\s+', ' ', text.strip())
+    text = _WHITESPACE.sub(' ', text.strip())
     
     # Remove special characters but keep meaningful ones
-    text = re.sub(r'[★⭐]', '', text)
+    text = _STARS.sub('', text)
     
     return text
 
-def extract_fields_from_text(text, form_number, filename):
-    """Extract form fields from PDF text content"""
-    fields = []
+def mark_lines(text):
+    """Split text into (line, is_candidate) pairs with one scan of the combined rules"""
+    lines = text.split('\n')
+    candidates = [False] * len(lines)
     
-    # Patterns to identify form fields
-    patterns = [
-        # Fields marked with asterisk (required fields)
-        r'[★⭐]\s*([A-Z][A-Za-z\s/]+(?:name|address|signature|date|email|telephone|city|state|zip|model|manufacturer|OCCB|license|cost|qty|HSPF|AFUE|FE|serial|install|company))',
-        
-        # Checkbox fields
-        r'☐\s*([A-Z][A-Za-z\s,/\-()]+)(?:\s*\.{2,}|\s*\$)',
-        
-        # Fields with colons
-        r'^([A-Z][A-Za-z\s/]+):\s*(?:_+|\s*$)',
-        
-        # Required field indicators
-        r'Indicates required field',
-    ]
+    # lower() never adds or removes newlines, so line numbers carry over
+    lower = text.lower()
+    line_number = 0
+    pos = 0
+    for match in _LINE_RULES.finditer(lower):
+        start = match.start()
+        line_number += lower.count('\n', pos, start)
+        pos = start
+        candidates[line_number] = True
     
-    lines = text.split('\n')
+    return zip(lines, candidates)
+
+def iter_marked_lines(pages):
+    """Yield (line, is_candidate) pairs for page texts as if they were newline-joined"""
+    for text in pages:
+        yield from mark_lines(text)
+    yield '', False
+
+def classify_line(line, raw_line, before, after):
+    """Yield field dicts (without document stamps) for one candidate line"""
+    lower = line.lower()
     
-    for i, line in enumerate(lines):
-        line = line.strip()
-        
-        # Skip headers and footers
-        if any(skip in line.lower() for skip in ['page', 'form 3', 'energy trust', 'return completed', 'upgrade types']):
-            continue
-        
-        # Look for signature fields
-        if 'signature' in line.lower() and len(line) < 100:
-            context = ' '.join(lines[max(0, i-2):min(len(lines), i+3)])
-            fields.append({
-                'field_type': 'Signature',
-                'field_name': clean_field_name(line),
-                'required': '★' in line or 'required' in line.lower(),
-                'context': clean_field_name(context[:200])
-            })
-        
-        # Look for text input fields (with underscores or colons)
-        if ('___' in line or ': ' in line) and len(line) < 100:
-            # Extract field label
-            label = re.sub(r'[_:]+.*$', '', line).strip()
-            if label and len(label) > 2:
-                fields.append({
-                    'field_type': 'Text Input',
-                    'field_name': clean_field_name(label),
-                    'required': '★' in line or '⭐' in line,
-                    'context': clean_field_name(line[:200])
-                })
-        
-        # Look for checkbox/radio options
-        checkbox_match = re.search(r'☐\s*([A-Z][A-Za-z\s,/\-()]+?)(?:\s*☐|\s*$)', line)
+    # Skip headers and footers
+    if _SKIP_RULE.search(lower):
+        return
+    
+    short = len(line) < 100
+    
+    # Look for signature fields
+    if short and 'signature' in lower:
+        context = ' '.join([*before, raw_line, *(next_line for next_line, _ in after)])
+        yield {
+            'field_type': 'Signature',
+            'field_name': clean_field_name(line),
+            'required': '★' in line or 'required' in lower,
+            'context': clean_field_name(context[:200])
+        }
+    
+    # Look for text input fields (with underscores or colons)
+    if short and ('___' in line or ': ' in line):
+        # Extract field label
+        label = line[:_LABEL_END.search(line).start()].strip()
+        if len(label) > 2:
+            yield {
+                'field_type': 'Text Input',
+                'field_name': clean_field_name(label),
+                'required': '★' in line or '⭐' in line,
+                'context': clean_field_name(line[:200])
+            }
+    
+    # Look for checkbox/radio options
+    if '☐' in line:
+        checkbox_match = _CHECKBOX.search(line)
         if checkbox_match:
-            fields.append({
+            yield {
                 'field_type': 'Checkbox',
                 'field_name': clean_field_name(checkbox_match.group(1)),
                 'required': False,
                 'context': clean_field_name(line[:200])
-            })
+            }
+
+def iter_fields(marked_lines, form_number, filename):
+    """Yield form fields from (line, is_candidate) pairs
     
-    # Add document reference and filename to each field
-    for field in fields:
-        field['form_number'] = form_number
-        field['document'] = filename
+    Lines are consumed lazily, keeping only the two lines either side of the
+    current line for signature context.
+    """
+    # Carry-over window: up to two raw lines before and after the current one
+    before = deque(maxlen=2)
+    after = deque()
+    marked_lines = iter(marked_lines)
     
-    return fields
+    while True:
+        while len(after) < 3:
+            item = next(marked_lines, None)
+            if item is None:
+                break
+            after.append(item)
+        if not after:
+            break
+        
+        raw_line, is_candidate = after.popleft()
+        if is_candidate:
+            for field in classify_line(raw_line.strip(), raw_line, before, after):
+                field['form_number'] = form_number
+                field['document'] = filename
+                yield field
+        
+        before.append(raw_line)
+
+def extract_fields_from_text(text, form_number, filename):
+    """Extract form fields from PDF text content"""
+    return list(iter_fields(mark_lines(text), form_number, filename))
 
-def extract_all_forms(pdf_dir):
-    """Process all PDFs in the directory"""
-    all_fields = []
-    pdf_files = list(Path(pdf_dir).glob('*.pdf'))
+def iter_page_texts(pdf_path, lazy=False):
+    """Yield the text of each page of a PDF, one page at a time
     
-    print(f"Found {len(pdf_files)} PDF files to process...")
+    The reader works on a memory map of the file; with lazy=True it also
+    releases each page's objects once its text is extracted.
+    """
+    return read_pages(pdf_reader_class(), pdf_path, lazy=lazy)
+
+def extract_page_texts(pdf_path, start=0, stop=None, lazy=False):
+    """Extract text from pages [start, stop) of a PDF, returning (texts, error)
     
-    for pdf_path in sorted(pdf_files):
-        print(f"Processing: {pdf_path.name}")
+    Each call opens its own reader on a memory map of the file, so workers
+    extracting different ranges of one document share its pages in memory.
+    """
+    try:
+        return extract_range(pdf_reader_class(), pdf_path, start, stop, lazy), None
+    except Exception as e:
+        return None, str(e)
+
+def page_ranges(pdf_path, pages_per_task):
+    """Split a PDF's pages into [start, stop) ranges of at most pages_per_task pages"""
+    try:
+        total = page_count(pdf_reader_class(), pdf_path)
+    except Exception:
+        # Let the worker hit (and report) the same error
+        return [(0, None)]
+    
+    if total <= pages_per_task:
+        return [(0, None)]
+    return chunk_page_ranges(total, pages_per_task)
+
+def extract_texts_parallel(pdf_files, jobs, split_pages=0, lazy=False):
+    """Extract page texts with a process pool, yielding (texts, error) per PDF in input order"""
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        doc_futures = []
+        for pdf_path in pdf_files:
+            ranges = page_ranges(pdf_path, split_pages) if split_pages else [(0, None)]
+            doc_futures.append([executor.submit(extract_page_texts, pdf_path, start, stop, lazy)
+                                for start, stop in ranges])
         
-        try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                # Extract text from all pages
-                full_text = ""
-                for page in pdf_reader.pages:
-                    full_text += page.extract_text() + "\n"
-                
-                # Get form number
-                form_number = extract_form_number(pdf_path.name)
-                
-                # Extract fields
-                fields = extract_fields_from_text(full_text, form_number, pdf_path.name)
-                all_fields.extend(fields)
+        # Merge page ranges back together in document and page order
+        for futures in doc_futures:
+            pages = []
+            for future in futures:
+                texts, error = future.result()
+                if error is not None:
+                    yield None, error
+                    break
+                pages.extend(texts)
+            else:
+                yield pages, None
+
+def extract_documents(pdf_files, jobs=1, split_pages=0, cache=None, lazy=False, page_texts=None,
+                      metrics=NULL_METRICS):
+    """Extract fields from each PDF, yielding (pdf_path, fields) in input order
+    
+    fields is None for documents that could not be read. With jobs > 1,
+    documents are extracted in a process pool; documents with more than
+    split_pages pages are further split into page ranges. Results are merged
+    in input order, so output matches a serial run. With a cache, only
+    documents whose content hash is not cached are parsed. lazy=True keeps
+    only the page being extracted resident in each reader. With page_texts
+    (a page_texts.PageTexts), pages are read from the shared artifact and
+    documents parsed here are added to it. metrics (a run_metrics.Metrics)
+    records per-document and per-page parse and classify times; under jobs > 1
+    parsing happens in the workers, so only the time spent waiting for them
+    is recorded, as parse_wait.
+    """
+    # Look up cached pages/fields by content hash before starting any workers
+    digests = {}
+    cache_keys = {}
+    cached = {}
+    stored = {}
+    if cache is not None or page_texts is not None:
+        version = extractor_version()
+        for pdf_path in pdf_files:
+            with metrics.stage('cache_lookup'):
+                digest = digests[pdf_path] = file_digest(pdf_path)
+                if cache is not None:
+                    key = cache.key(digest, version)
+                    cache_keys[pdf_path] = key
+                    entry = cache.get(key)
+                    if entry is not None:
+                        cached[pdf_path] = entry
+                if page_texts is not None:
+                    pages = page_texts.get(pdf_path, digest)
+                    if pages is not None:
+                        stored[pdf_path] = pages
+    
+    to_parse = [pdf_path for pdf_path in pdf_files if pdf_path not in cached and pdf_path not in stored]
+    parallel_texts = extract_texts_parallel(to_parse, jobs, split_pages, lazy) if jobs > 1 else None
+    
+    for pdf_path in pdf_files:
+        with metrics.document(pdf_path.name, pdf_path) as record:
+            entry = cached.get(pdf_path)
+            if entry is not None:
+                pages, error = entry['pages'], None
+            elif pdf_path in stored:
+                pages, error = stored[pdf_path], None
+            elif parallel_texts is not None:
+                with metrics.stage('parse_wait', record):
+                    pages, error = next(parallel_texts)
+            else:
+                # Serial runs stream pages straight from the reader
+                pages, error = iter_page_texts(pdf_path, lazy), None
+            
+            print(f"Processing: {pdf_path.name}")
+            
+            # Get form number
+            form_number = extract_form_number(pdf_path.name)
+            page_list = None
+            
+            if error is None and entry is not None and entry.get('field_parser') == FIELD_PARSER_VERSION:
+                # Same content may be cached under another filename, so restamp
+                with metrics.stage('cached_fields', record):
+                    fields = [dict(field, form_number=form_number, document=pdf_path.name)
+                              for field in entry['fields']]
+            elif error is None:
+                # Keep the page texts only if they are going into the cache or artifact
+                page_list = [] if cache is not None or page_texts is not None else None
+                if page_list is not None:
+                    pages = collect_pages(pages, page_list)
+                pages = metrics.pages(record, pages)
                 
-                print(f"  Found {len(fields)} fields in {pdf_path.name}")
+                # Extract fields page by page
+                try:
+                    with metrics.stage('classify', record):
+                        fields = list(iter_fields(iter_marked_lines(pages), form_number, pdf_path.name))
+                except Exception as e:
+                    error = str(e)
                 
-        except Exception as e:
-            print(f"  Error processing {pdf_path.name}: {e}")
+                if error is None and cache is not None:
+                    with metrics.stage('cache_write', record):
+                        cache.put(cache_keys[pdf_path], {
+                            'extractor': version,
+                            'pages': page_list,
+                            'field_parser': FIELD_PARSER_VERSION,
+                            'fields': fields
+                        })
+            
+            if error is None and page_texts is not None and pdf_path not in stored:
+                # Whichever pipeline parses a document first shares its pages
+                with metrics.stage('cache_write', record):
+                    page_texts.put(pdf_path, entry['pages'] if page_list is None else page_list,
+                                   digests[pdf_path])
+        
+        if error is not None:
+            print(f"  Error processing {pdf_path.name}: {error}")
+            yield pdf_path, None
+            continue
+        
+        print(f"  Found {len(fields)} fields in {pdf_path.name}")
+        yield pdf_path, fields
     
-    return all_fields
+    if cache is not None:
+        print(f"Extraction cache: {cache.hits} hits, {cache.misses} misses")
+        metrics.record_cache('extraction', cache)
 
-def deduplicate_fields(fields):
-    """Remove duplicate fields while preserving context"""
-    seen = {}
-    unique_fields = []
+def collect_pages(pages, page_list):
+    """Pass page texts through, appending each one to page_list"""
+    for text in pages:
+        page_list.append(text)
+        yield text
+
+def iter_all_fields(pdf_dir, jobs=1, split_pages=0, cache=None, lazy=False, page_texts=None,
+                    metrics=NULL_METRICS):
+    """Yield fields from all PDFs in the directory (see extract_documents for options)"""
+    pdf_files = sorted(Path(pdf_dir).glob('*.pdf'))
+    
+    print(f"Found {len(pdf_files)} PDF files to process...")
+    
+    documents = extract_documents(pdf_files, jobs, split_pages, cache, lazy, page_texts, metrics)
+    for pdf_path, fields in metrics.iter_timed('extract', documents):
+        if fields is not None:
+            yield from fields
+
+def extract_all_forms(pdf_dir, jobs=1, split_pages=0, cache=None, lazy=False, page_texts=None,
+                      metrics=NULL_METRICS):
+    """Process all PDFs in the directory (see extract_documents for options)"""
+    return list(iter_all_fields(pdf_dir, jobs, split_pages, cache, lazy, page_texts, metrics))
+
+_NAME_NOISE = re.compile(r'[\W_]+')
+
+MERGE_REPORT_FIELDNAMES = ['form_number', 'field_type', 'kept_name', 'merged_name',
+                           'similarity', 'kept_document', 'merged_document']
+
+def _trigrams(squashed):
+    padded = f"^{squashed}$"
+    return frozenset(padded[i:i + 3] for i in range(max(1, len(padded) - 2)))
+
+class NearDuplicateIndex:
+    """Finds earlier fields whose names differ only by extraction noise
+    
+    Names are compared within each (form_number, field_type) after squashing
+    case, spaces and punctuation ('Serial #' == 'serial#'), and otherwise by
+    Jaccard similarity of their character trigrams. Candidates come from an
+    inverted index over a prefix of each trigram set, which must overlap for
+    any pair that reaches the threshold, so each lookup touches only a few
+    kept fields instead of all of them.
+    """
+    
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.squashed = {}
+        self.postings = {}
+        self.kept = []
+    
+    def _prefix(self, grams):
+        ordered = sorted(grams)
+        return ordered[:len(ordered) - math.ceil(self.threshold * len(ordered) - 1e-9) + 1]
+    
+    def match(self, field):
+        """Return (kept_field, similarity) for the best earlier match, or record field as kept and return None"""
+        block = (field['form_number'], field['field_type'])
+        squashed = _NAME_NOISE.sub('', field['field_name'].lower())
+        kept = self.squashed.get(block + (squashed,))
+        if kept is not None:
+            return kept, 1.0
+        
+        grams = _trigrams(squashed)
+        size = len(grams)
+        prefix = self._prefix(grams)
+        candidates = set()
+        for gram in prefix:
+            candidates.update(self.postings.get(block + (gram,), ()))
+        
+        best = None
+        best_index = None
+        low, high = size * self.threshold, size / self.threshold
+        for index in candidates:
+            kept_grams, kept_field = self.kept[index]
+            if not low <= len(kept_grams) <= high:
+                continue
+            shared = len(grams & kept_grams)
+            similarity = shared / (size + len(kept_grams) - shared)
+            if similarity < self.threshold - 1e-9:
+                continue
+            # Highest similarity wins, then the earliest kept field
+            if best is None or similarity > best[1] or (similarity == best[1] and index < best_index):
+                best, best_index = (kept_field, similarity), index
+        if best is not None:
+            return best
+        
+        self.squashed[block + (squashed,)] = field
+        index = len(self.kept)
+        self.kept.append((grams, field))
+        for gram in prefix:
+            self.postings.setdefault(block + (gram,), []).append(index)
+        return None
+
+def iter_unique_fields(fields, counts=None, fuzzy=0, merges=None):
+    """Yield the first occurrence of each (form_number, field_name, field_type)
+    
+    If counts is given, counts['total'] and counts['unique'] are updated as
+    fields stream through. With fuzzy set to a similarity threshold (0-1),
+    fields whose names are near-duplicates of an earlier field of the same form
+    and type are merged into it too; each merge is appended to merges, if given,
+    as a MERGE_REPORT_FIELDNAMES dict.
+    """
+    seen = set()
+    near = NearDuplicateIndex(fuzzy) if fuzzy else None
     
     for field in fields:
         key = (field['form_number'], field['field_name'], field['field_type'])
+        if counts is not None:
+            counts['total'] += 1
         
-        if key not in seen:
-            seen[key] = True
-            unique_fields.append(field)
-    
-    return unique_fields
+        if key in seen:
+            continue
+        
+        if near is not None:
+            match = near.match(field)
+            if match is not None:
+                kept, similarity = match
+                if counts is not None:
+                    counts['merged'] = counts.get('merged', 0) + 1
+                if merges is not None:
+                    merges.append({
+                        'form_number': field['form_number'],
+                        'field_type': field['field_type'],
+                        'kept_name': kept['field_name'],
+                        'merged_name': field['field_name'],
+                        'similarity': f"{similarity:.3f}",
+                        'kept_document': kept['document'],
+                        'merged_document': field['document']
+                    })
+                # Later exact copies of this name are dropped without another report
+                seen.add(key)
+                continue
+        
+        seen.add(key)
+        if counts is not None:
+            counts['unique'] += 1
+        yield field
+
+def deduplicate_fields(fields, fuzzy=0, merges=None):
+    """Remove duplicate fields while preserving context"""
+    return list(iter_unique_fields(fields, fuzzy=fuzzy, merges=merges))
+
+def write_merge_report(merges, report_path):
+    """Write the near-duplicate merge decisions to a CSV"""
+    with open(report_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=MERGE_REPORT_FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(merges)
+    print(f"✓ Merge report created: {report_path} ({len(merges)} near-duplicates merged)")
+
+def add_dedup_arguments(parser):
+    """Add the near-duplicate options to an argparse parser"""
+    parser.add_argument("--fuzzy", type=float, default=0, metavar="THRESHOLD",
+                        help="Also merge near-duplicate field names of the same form and type whose "
+                             "trigram similarity is at least THRESHOLD, e.g. 0.85 (default: 0, exact only)")
+    parser.add_argument("--merge-report", metavar="PATH",
+                        help="With --fuzzy, write every merge decision to this CSV")
 
-def main(pdf_dir=None):
+def main(pdf_dir=None, jobs=1, split_pages=0, cache=None, fuzzy=0, merge_report=None, lazy=False,
+         page_texts=None, metrics=NULL_METRICS):
     if pdf_dir is None:
         pdf_dir = os.getcwd()
     output_csv = os.path.join(pdf_dir, 'form_fields_comprehensive.csv')
@@ -159,20 +496,24 @@ def main(pdf_dir=None):
     print("Energy Trust of Oregon - Form Field Extractor")
     print("="*60)
     
-    # Extract fields from all PDFs
-    all_fields = extract_all_forms(pdf_dir)
+    # Extract and deduplicate fields as they stream in; only unique fields are
+    # held, since the CSV is sorted
+    counts = {'total': 0, 'unique': 0}
+    merges = []
+    fields = iter_all_fields(pdf_dir, jobs, split_pages, cache, lazy, page_texts, metrics)
+    unique_fields = list(metrics.iter_timed('dedup', iter_unique_fields(fields, counts, fuzzy, merges)))
     
-    # Deduplicate
-    unique_fields = deduplicate_fields(all_fields)
-    
-    print(f"\nTotal fields extracted: {len(all_fields)}")
-    print(f"Unique fields: {len(unique_fields)}")
+    print(f"\nTotal fields extracted: {counts['total']}")
+    print(f"Unique fields: {counts['unique']}")
+    if fuzzy:
+        print(f"Near-duplicates merged: {len(merges)}")
+        if merge_report:
+            write_merge_report(merges, merge_report)
     
     # Write to CSV
     if unique_fields:
-        with open(output_csv, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['form_number', 'document', 'field_name', 'field_type', 'required', 'context']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        with metrics.stage('csv_write'), open(output_csv, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=RAW_FIELDNAMES)
             
             writer.writeheader()
             for field in sorted(unique_fields, key=lambda x: (x['form_number'], x['field_name'])):
@@ -184,11 +525,31 @@ def main(pdf_dir=None):
         print("\n⚠ No fields found to write to CSV")
 
 if __name__ == "__main__":
-    import sys
-    # Allow specifying directory as argument
-    if len(sys.argv) > 1:
-        pdf_dir = sys.argv[1]
-    else:
-        pdf_dir = os.getcwd()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Extract form fields from PDFs into a CSV")
+    parser.add_argument("pdf_dir", nargs="?", default=os.getcwd(),
+                        help="Directory of PDFs (default: current directory)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Worker processes for PDF extraction (default: 1, 0 = all CPUs)")
+    parser.add_argument("--split-pages", type=int, default=0, metavar="N",
+                        help="With --jobs, split documents longer than N pages across workers")
+    parser.add_argument("--lazy-pages", action="store_true",
+                        help="Release each page's objects once its text is extracted (lower memory, a little slower)")
+    parser.add_argument("--pages-dir", metavar="DIR",
+                        help="Read page texts from, and add newly parsed ones to, a shared page text "
+                             "directory (see page_texts.py)")
+    add_dedup_arguments(parser)
+    add_cache_arguments(parser)
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    
+    page_texts = None
+    if args.pages_dir:
+        from page_texts import PageTexts
+        page_texts = PageTexts(args.pages_dir)
     
-    main(pdf_dir)
+    metrics = metrics_from_args(args, 'extract_form_fields')
+    main(args.pdf_dir, args.jobs or os.cpu_count(), args.split_pages, cache_from_args(args),
+         args.fuzzy, args.merge_report, args.lazy_pages, page_texts, metrics)
+    finish_metrics(metrics, args)
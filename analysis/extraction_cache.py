@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+On-disk cache for PDF extraction results
+Entries are keyed on the PDF's content hash and the extractor version, so an
+unchanged document is never parsed twice. Least recently used entries are
+evicted once the cache grows past its size limit. pdf_fabric_processor.py
+uses a separate instance to memoize fabric outputs.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'cpf-extraction')
+DEFAULT_MAX_MB = 256
+# Eviction trims the cache to this fraction of max_bytes, so the directory is
+# only rescanned after another tenth of the limit has been written
+EVICT_TO = 0.9
+
+def file_digest(path):
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ExtractionCache:
+    """Size-bounded JSON cache stored as one file per entry"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_MB * 1024 * 1024, rebuild=False,
+                 suffix='.json'):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.rebuild = rebuild
+        # Only files with this suffix are entries (and are ever evicted)
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Running total of entry sizes, measured once on the first put
+        self._size = None
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def key(self, digest, extractor):
+        """Build a cache key from a content digest and an extractor version string"""
+        return hashlib.sha256(f"{extractor}\0{digest}".encode()).hexdigest()
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}{self.suffix}"
+
+    def get(self, key):
+        """Return the cached entry for key, or None on a miss"""
+        path = self._path(key)
+        if self.rebuild:
+            self._count(hit=False)
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._count(hit=False)
+            return None
+
+        # Refresh mtime so eviction is least-recently-used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._count(hit=True)
+        return entry
+
+    def _count(self, hit):
+        # Caches are shared by worker threads (e.g. concurrent fabric calls)
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def put(self, key, entry):
+        """Store an entry, then evict old entries if over the size limit"""
+        path = self._path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            size = os.path.getsize(tmp_path)
+            try:
+                replaced = path.stat().st_size
+            except OSError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan()[1]
+            else:
+                self._size += size - replaced
+            over = self._size > self.max_bytes
+        if over:
+            self.evict(int(self.max_bytes * EVICT_TO))
+
+    def _scan(self):
+        """Return ([(mtime, size, path)], total size) for every entry on disk"""
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob(f'*{self.suffix}'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        return entries, total
+
+    def evict(self, target=None):
+        """Remove least recently used entries until the cache fits in target (default: max_bytes)"""
+        if target is None:
+            target = self.max_bytes
+        entries, total = self._scan()
+
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+        
+        with self._lock:
+            self._size = total
+
+def add_cache_arguments(parser):
+    """Add the shared cache options to an argparse parser"""
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help=f"Extraction cache directory (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_MB,
+                        help=f"Evict least recently used entries beyond this size (default: {DEFAULT_MAX_MB})")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--no-cache", action="store_true",
+                       help="Parse every PDF without reading or writing the cache")
+    group.add_argument("--rebuild-cache", action="store_true",
+                       help="Ignore cached entries and overwrite them with fresh results")
+
+def cache_from_args(args):
+    """Build an ExtractionCache from parsed arguments, or None with --no-cache"""
+    if args.no_cache:
+        return None
+    return ExtractionCache(args.cache_dir, args.cache_max_mb * 1024 * 1024, args.rebuild_cache)
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Long-running form field extraction service
+Serves extraction over HTTP (TCP or a Unix socket) from a warm process pool:
+workers import PyPDF2 once at startup, so each upload costs only its parse.
+POST a PDF to /extract and get its enhanced field rows back as JSON, the same
+rows enhance_form_fields.py would write for it before deduplication.
+Uploads beyond the workers plus a bounded queue are turned away with 503 and
+Retry-After rather than piling up, and the body is only read once an upload
+has a slot, so memory stays bounded by (jobs + queue) * max upload size.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import socketserver
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from cpf_extraction import (
+    DocumentError, enhance_fields, extract_form_number, iter_fields, iter_marked_lines
+)
+from extract_form_fields import pdf_reader_class
+from pdf_input import read_stream_pages
+
+DEFAULT_PORT = 8765
+DEFAULT_QUEUE = 16
+DEFAULT_MAX_MB = 50
+DEFAULT_TIMEOUT = 120
+
+# Read uploads in pieces so a slow client doesn't need one large recv
+READ_CHUNK_BYTES = 1024 * 1024
+
+def _warm_worker():
+    # Pay the PDF library import once per worker, not once per upload
+    pdf_reader_class()
+
+def extract_upload(data, filename, lazy=False):
+    """Return enhanced field rows for one PDF held in memory (runs in a worker)"""
+    try:
+        pages = read_stream_pages(pdf_reader_class(), io.BytesIO(data), lazy)
+        fields = iter_fields(iter_marked_lines(pages), extract_form_number(filename), filename)
+        return enhance_fields(fields)
+    except Exception as e:
+        raise DocumentError(f"Error reading PDF: {e}")
+
+class ServiceBusy(Exception):
+    """Every worker is busy and the queue is full"""
+
+class ExtractionService:
+    """A warm process pool with bounded admission"""
+
+    def __init__(self, jobs=1, max_queue=DEFAULT_QUEUE, timeout=DEFAULT_TIMEOUT, lazy=False):
+        self.jobs = jobs
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.lazy = lazy
+        self.slots = threading.BoundedSemaphore(jobs + max_queue)
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+        self.executor = self._start_pool()
+
+    def _start_pool(self):
+        executor = ProcessPoolExecutor(max_workers=self.jobs, initializer=_warm_worker)
+        # Start every worker now so the first uploads don't wait for them
+        for future in [executor.submit(time.sleep, 0) for _ in range(self.jobs)]:
+            future.result()
+        return executor
+
+    def admit(self):
+        """Claim a slot for one upload, or raise ServiceBusy; extract() or release() gives it back"""
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            raise ServiceBusy()
+        with self.lock:
+            self.in_flight += 1
+
+    def release(self):
+        with self.lock:
+            self.in_flight -= 1
+        self.slots.release()
+
+    def extract(self, data, filename):
+        """
+        Return enhanced rows for an admitted upload; raises DocumentError or TimeoutError
+        The upload's slot passes to its job and is released when the job is
+        done, not when the request stops waiting for it: a timed-out job that
+        is still queued is cancelled, and one already running keeps its slot
+        (and its upload in memory) until the worker finishes with it.
+        """
+        executor = self.executor
+        try:
+            try:
+                future = executor.submit(extract_upload, data, filename, self.lazy)
+            except BaseException:
+                self.release()
+                raise
+            future.add_done_callback(lambda _: self.release())
+            try:
+                rows = future.result(self.timeout)
+            except FutureTimeoutError:
+                future.cancel()
+                raise TimeoutError(f"Extraction took longer than {self.timeout}s")
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); replace the pool for later uploads
+            with self.lock:
+                if self.executor is executor:
+                    executor.shutdown(wait=False)
+                    self.executor = self._start_pool()
+            raise
+        with self.lock:
+            self.completed += 1
+        return rows
+
+    def status(self):
+        with self.lock:
+            return {
+                'status': 'ok',
+                'workers': self.jobs,
+                'queue_limit': self.max_queue,
+                'in_flight': self.in_flight,
+                'completed': self.completed,
+                'rejected': self.rejected,
+            }
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+class ExtractionHandler(BaseHTTPRequestHandler):
+    """POST /extract?filename=NAME with a PDF body; GET /health for pool status"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def _send_json(self, status, body, headers=None):
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_body(self, length):
+        body = bytearray()
+        while len(body) < length:
+            chunk = self.rfile.read(min(READ_CHUNK_BYTES, length - len(body)))
+            if not chunk:
+                raise ConnectionError("Client closed the connection mid-upload")
+            body.extend(chunk)
+        return bytes(body)
+
+    def do_GET(self):
+        if urlsplit(self.path).path != '/health':
+            self._send_json(404, {'error': 'Not found'})
+            return
+        self._send_json(200, self.server.service.status())
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != '/extract':
+            self._send_json(404, {'error': 'Not found'})
+            return
+
+        length = self.headers.get('Content-Length')
+        if length is None or not length.isdigit():
+            self.close_connection = True
+            self._send_json(411, {'error': 'Content-Length required'})
+            return
+        length = int(length)
+        if length > self.server.max_bytes:
+            # The body is never read, so the connection can't be reused
+            self.close_connection = True
+            self._send_json(413, {'error': f"Upload larger than {self.server.max_bytes} bytes"})
+            return
+
+        service = self.server.service
+        try:
+            service.admit()
+        except ServiceBusy:
+            self.close_connection = True
+            self._send_json(503, {'error': 'Extraction queue is full'}, {'Retry-After': '1'})
+            return
+
+        try:
+            data = self._read_body(length)
+        except BaseException:
+            service.release()
+            raise
+
+        # From here the slot belongs to the extraction job
+        filename = os.path.basename(parse_qs(url.query).get('filename', ['upload.pdf'])[0])
+        started = time.perf_counter()
+        try:
+            rows = service.extract(data, filename)
+        except DocumentError as e:
+            self._send_json(422, {'error': str(e), 'document': filename})
+            return
+        except TimeoutError as e:
+            self._send_json(504, {'error': str(e), 'document': filename})
+            return
+        except BrokenProcessPool:
+            self._send_json(500, {'error': 'Extraction worker died', 'document': filename})
+            return
+        self._send_json(200, {
+            'document': filename,
+            'form_number': extract_form_number(filename),
+            'fields': rows,
+            'parse_ms': round((time.perf_counter() - started) * 1000, 1),
+        })
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class ExtractionServer(ThreadingHTTPServer):
+    """HTTP server over TCP that hands uploads to an ExtractionService"""
+
+    def __init__(self, address, service, max_bytes=DEFAULT_MAX_MB * 1024 * 1024, verbose=False):
+        self.service = service
+        self.max_bytes = max_bytes
+        self.verbose = verbose
+        super().__init__(address, ExtractionHandler)
+
+class UnixExtractionServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """ExtractionServer on a Unix socket, for callers on the same host"""
+
+    daemon_threads = True
+
+    def __init__(self, path, service, max_bytes=DEFAULT_MAX_MB * 1024 * 1024, verbose=False):
+        self.service = service
+        self.max_bytes = max_bytes
+        self.verbose = verbose
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, _UnixExtractionHandler)
+
+class _UnixExtractionHandler(ExtractionHandler):
+    def address_string(self):
+        # Unix socket peers have no address
+        return self.server.server_address
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve form field extraction from a warm worker pool")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"TCP port (default: {DEFAULT_PORT})")
+    parser.add_argument("--socket", metavar="PATH", help="Listen on this Unix socket instead of TCP")
+    parser.add_argument("-j", "--jobs", type=int, default=0,
+                        help="Worker processes (default: 0 = all CPUs)")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_QUEUE,
+                        help=f"Uploads allowed to wait for a worker before answering 503 (default: {DEFAULT_QUEUE})")
+    parser.add_argument("--max-mb", type=int, default=DEFAULT_MAX_MB,
+                        help=f"Largest accepted upload in MB (default: {DEFAULT_MAX_MB})")
+    parser.add_argument("--timeout", type=int, default=DEFAULT_TIMEOUT,
+                        help=f"Seconds to wait for one extraction before answering 504 (default: {DEFAULT_TIMEOUT})")
+    parser.add_argument("--lazy-pages", action="store_true",
+                        help="Release each page's objects once its text is extracted (lower memory, a little slower)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    try:
+        pdf_reader_class()
+    except ImportError:
+        print("Error: PyPDF2 is required. Install with: pip install PyPDF2", file=sys.stderr)
+        sys.exit(1)
+
+    jobs = args.jobs or os.cpu_count()
+    service = ExtractionService(jobs, args.max_queue, args.timeout, args.lazy_pages)
+    max_bytes = args.max_mb * 1024 * 1024
+    if args.socket:
+        server = UnixExtractionServer(args.socket, service, max_bytes, args.verbose)
+        where = args.socket
+    else:
+        server = ExtractionServer((args.host, args.port), service, max_bytes, args.verbose)
+        where = f"http://{args.host}:{server.server_address[1]}"
+
+    print(f"✓ Extraction service on {where} ({jobs} workers, queue {args.max_queue})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+if __name__ == "__main__":
+    main()
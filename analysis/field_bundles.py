@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Build static JSON bundles of enhanced form fields for the HTML tools
+Writes one compact shard per form plus index.json, which lists every form
+with its shard URL and field/category counts. A page fetches the index,
+then only the shards for the forms it renders. Shard names include a content
+hash, so they can be cached indefinitely and only change when their fields do.
+"""
+
+import os
+import re
+import csv
+import json
+import hashlib
+from pathlib import Path
+
+from enhance_form_fields import ENHANCED_FIELDNAMES
+
+BUNDLE_VERSION = 1
+
+# form_id and form_number are the same for every row of a shard, so they are
+# stored once in the shard header instead of per row
+SHARD_COLUMNS = [name for name in ENHANCED_FIELDNAMES if name not in ('form_id', 'form_number')]
+
+def _dumps(obj):
+    # Compact, deterministic JSON compresses well and only changes with the data
+    return json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+def _write_atomic(path, text):
+    tmp_path = str(path) + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def form_slug(form_id):
+    """Return a filename-safe slug for a form ID"""
+    return re.sub(r'[^a-z0-9]+', '-', form_id.lower()).strip('-') or 'form'
+
+def build_bundles(rows, bundle_dir):
+    """
+    Write per-form shards and index.json for enhanced rows into bundle_dir
+    Shards no longer referenced by the new index are removed afterwards.
+    Returns the index dict.
+    """
+    bundle_dir = Path(bundle_dir)
+    forms_dir = bundle_dir / 'forms'
+    forms_dir.mkdir(parents=True, exist_ok=True)
+
+    by_form = {}
+    for row in rows:
+        by_form.setdefault(row['form_id'], []).append(row)
+
+    index = {'version': BUNDLE_VERSION, 'columns': SHARD_COLUMNS, 'forms': {}}
+    written = set()
+    for form_id in sorted(by_form):
+        form_rows = by_form[form_id]
+        shard = {
+            'form_id': form_id,
+            'form_number': form_rows[0]['form_number'],
+            'columns': SHARD_COLUMNS,
+            'rows': [
+                [row[name] == 'True' if name == 'required' else row[name] for name in SHARD_COLUMNS]
+                for row in form_rows
+            ]
+        }
+        text = _dumps(shard)
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()[:10]
+        filename = f"{form_slug(form_id)}.{digest}.json"
+        path = forms_dir / filename
+        if not path.exists():
+            _write_atomic(path, text)
+        written.add(filename)
+
+        categories = {}
+        for row in form_rows:
+            categories[row['field_category']] = categories.get(row['field_category'], 0) + 1
+        index['forms'][form_id] = {
+            'form_number': shard['form_number'],
+            'shard': f"forms/{filename}",
+            'fields': len(form_rows),
+            'required': sum(1 for row in form_rows if row['required'] == 'True'),
+            'languages': sorted({row['language'] for row in form_rows}),
+            'categories': categories
+        }
+
+    # Publish the index only once every shard it names exists
+    _write_atomic(bundle_dir / 'index.json', _dumps(index))
+
+    for path in forms_dir.glob('*.json'):
+        if path.name not in written:
+            path.unlink()
+
+    return index
+
+def build_bundles_from_csv(csv_path, bundle_dir):
+    """Build bundles from an enhanced CSV such as form_fields_enhanced.csv"""
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        index = build_bundles(csv.DictReader(f), bundle_dir)
+
+    total = sum(form['fields'] for form in index['forms'].values())
+    print(f"✓ Field bundles written: {bundle_dir} ({len(index['forms'])} forms, {total} fields)")
+    return index
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Build per-form JSON bundles from an enhanced CSV")
+    parser.add_argument("csv", help="Enhanced CSV, e.g. form_fields_enhanced.csv")
+    parser.add_argument("bundle_dir", help="Output directory for index.json and forms/")
+    args = parser.parse_args()
+
+    build_bundles_from_csv(args.csv, args.bundle_dir)
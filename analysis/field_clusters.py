@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Cross-form field clusters
+Links the same question across forms and languages (e.g. 'customer_signature'
+on 350CC and 'firma_del_cliente' on 350CC-ES) by mapping every field to a
+canonical cluster. Each distinct normalized name becomes a set of canonical
+tokens: accents are stripped, Spanish words are translated through a
+bilingual synonym table, filler words are dropped and plurals folded.
+Identical token sets share a cluster. Sets whose Jaccard similarity reaches
+the threshold are merged too, with candidates found through a token
+inverted index with prefix filtering, so the cost grows with the number of
+distinct names rather than with every pair of them.
+"""
+
+import csv
+import hashlib
+import unicodedata
+from collections import Counter, defaultdict
+from math import ceil
+
+# Spanish -> English tokens, after accent stripping
+SYNONYMS = {
+    'cliente': 'customer', 'clientes': 'customer', 'propietario': 'homeowner',
+    'inquilino': 'renter', 'contratista': 'contractor', 'contratistas': 'contractor',
+    'empresa': 'company', 'firma': 'signature', 'nombre': 'name', 'fecha': 'date',
+    'direccion': 'address', 'correo': 'email', 'electronico': 'email',
+    'telefono': 'phone', 'ciudad': 'city', 'estado': 'state', 'postal': 'zip',
+    'pago': 'payment', 'pagos': 'payment', 'monto': 'amount', 'cantidad': 'amount',
+    'incentivo': 'incentive', 'incentivos': 'incentive', 'costo': 'cost',
+    'precio': 'price', 'factura': 'invoice', 'facturas': 'invoice',
+    'descuento': 'discount', 'financiacion': 'funding', 'ingreso': 'income',
+    'bruto': 'gross', 'anual': 'annual', 'mensual': 'monthly', 'hogar': 'household',
+    'vivienda': 'home', 'hogares': 'home', 'elegibilidad': 'eligibility',
+    'elegibles': 'eligible', 'elegible': 'eligible', 'autorizacion': 'authorization',
+    'derechos': 'rights', 'propiedad': 'property', 'solicitud': 'application',
+    'prueba': 'proof', 'compra': 'purchase', 'revelacion': 'release',
+    'informacion': 'information', 'verificacion': 'verification', 'calidad': 'quality',
+    'trabajo': 'work', 'codigos': 'codes', 'seguridad': 'safety',
+    'construccion': 'building', 'productos': 'products', 'acceso': 'access',
+    'evaluacion': 'evaluation', 'evaluador': 'assessor', 'organizacion': 'organization',
+    'participante': 'participating', 'responsabilidad': 'liability',
+    'exoneracion': 'disclaimer', 'endoso': 'endorsement', 'impuestos': 'tax',
+    'bomba': 'pump', 'calor': 'heat', 'calentador': 'heater', 'agua': 'water',
+    'aislamiento': 'insulation', 'atico': 'attic', 'piso': 'floor', 'pared': 'wall',
+    'ventanas': 'windows', 'techo': 'ceiling', 'termostato': 'thermostat',
+    'inteligente': 'smart', 'ductos': 'ducts', 'chimenea': 'fireplace',
+    'horno': 'furnace', 'combustible': 'fuel', 'calefaccion': 'heating',
+    'sistema': 'system', 'proveedor': 'provider', 'electricidad': 'electric',
+    'ano': 'year', 'sotano': 'basement', 'cimientos': 'foundation', 'pisos': 'stories',
+    'pies': 'feet', 'cuadrados': 'square', 'modelo': 'model', 'numero': 'number',
+    'serie': 'serial', 'fabricante': 'manufacturer', 'capacidad': 'capacity',
+    'instalacion': 'installation', 'instalado': 'installed', 'programa': 'program',
+    'seccion': 'section', 'plagas': 'pests', 'asbesto': 'asbestos', 'plomo': 'lead',
+    'otro': 'other', 'si': 'yes', 'notificacion': 'notification', 'mejora': 'upgrade',
+    'energetica': 'energy', 'energetico': 'energy', 'energia': 'energy',
+    'materiales': 'materials', 'escaneados': 'scanned', 'idioma': 'language',
+    'raza': 'race', 'genero': 'gender', 'residentes': 'residents',
+}
+
+# Words that carry no meaning for matching, in either language
+STOPWORDS = {
+    'a', 'an', 'and', 'the', 'of', 'or', 'for', 'to', 'on', 'in', 'by', 'is', 'are',
+    'de', 'del', 'la', 'el', 'los', 'las', 'y', 'o', 'en', 'para', 'por', 'al',
+    'un', 'una', 'su', 'sus', 'con',
+}
+
+DEFAULT_THRESHOLD = 0.8
+
+def _strip_accents(text):
+    if text.isascii():
+        return text
+    return ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+
+def canonical_tokens(normalized_name):
+    """Return the canonical token set for a normalized field name"""
+    tokens = set()
+    for token in _strip_accents(normalized_name).split('_'):
+        token = SYNONYMS.get(token, token)
+        if not token or token in STOPWORDS:
+            continue
+        # Fold simple plurals ('windows' -> 'window', 'ventanas' -> 'windows' -> 'window')
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.add(token)
+    return frozenset(tokens)
+
+class _DisjointSet:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        root = item
+        while self.parent.setdefault(root, root) != root:
+            root = self.parent[root]
+        # Path compression keeps later lookups flat
+        while item != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[root_b] = root_a
+
+def _similar_pairs(token_sets, threshold):
+    """Yield index pairs of token sets with Jaccard similarity >= threshold"""
+    frequency = Counter(token for tokens in token_sets for token in tokens)
+    # Rarest tokens first: two sets reaching the threshold must share a
+    # token within each other's prefix, so only prefixes are indexed
+    ordered = [sorted(tokens, key=lambda t: (frequency[t], t)) for tokens in token_sets]
+    sizes = [len(tokens) for tokens in token_sets]
+    inverted = defaultdict(list)
+
+    # Sets are visited smallest first, so every posting list is in size order
+    # and a set can only pair with earlier ones of at least threshold * its size
+    for i in sorted(range(len(ordered)), key=sizes.__getitem__):
+        size = sizes[i]
+        if not size:
+            continue
+        min_size = threshold * size - 1e-9
+        prefix = size - ceil(min_size) + 1
+        candidates = set()
+        for token in ordered[i][:prefix]:
+            postings = inverted[token]
+            for j in reversed(postings):
+                if sizes[j] < min_size:
+                    break
+                candidates.add(j)
+            postings.append(i)
+
+        for j in candidates:
+            shared = len(token_sets[i] & token_sets[j])
+            if shared / (size + sizes[j] - shared) >= threshold - 1e-9:
+                yield j, i
+
+def cluster_id(label, tokens):
+    """Build a cluster ID from its label and canonical tokens"""
+    short_hash = hashlib.md5(' '.join(sorted(tokens)).encode()).hexdigest()[:6]
+    return f"CL_{short_hash}_{label[:20]}"
+
+def build_clusters(rows, threshold=DEFAULT_THRESHOLD):
+    """
+    Map enhanced rows to cross-form clusters
+    Returns (field_clusters, clusters): field_clusters maps each field_id to
+    its cluster ID, and clusters maps cluster IDs to a summary with the
+    label (most common member name), members, forms and languages.
+    """
+    name_counts = Counter()
+    fields_by_name = defaultdict(dict)
+    forms_by_name = defaultdict(set)
+    languages_by_name = defaultdict(set)
+    for row in rows:
+        name = row['normalized_name']
+        name_counts[name] += 1
+        fields_by_name[name].setdefault(row['field_id'], None)
+        forms_by_name[name].add(row['form_id'])
+        languages_by_name[name].add(row['language'])
+
+    # Names with the same canonical tokens start in one group
+    tokens_by_name = {name: canonical_tokens(name) for name in name_counts}
+    names_by_tokens = defaultdict(list)
+    for name, tokens in tokens_by_name.items():
+        names_by_tokens[tokens].append(name)
+    token_sets = list(names_by_tokens)
+
+    groups = _DisjointSet()
+    for i in range(len(token_sets)):
+        groups.find(i)
+    if threshold < 1:
+        for i, j in _similar_pairs(token_sets, threshold):
+            groups.union(i, j)
+
+    members = defaultdict(list)
+    for i, tokens in enumerate(token_sets):
+        members[groups.find(i)].extend(names_by_tokens[tokens])
+
+    field_clusters = {}
+    clusters = {}
+    for names in members.values():
+        # Most common member name, preferring English and then the first seen among ties
+        label = max(names, key=lambda name: (name_counts[name], 'en' in languages_by_name[name]))
+        cid = cluster_id(label, tokens_by_name[label])
+        clusters[cid] = {
+            'label': label,
+            'normalized_names': names,
+            'field_ids': [field_id for name in names for field_id in fields_by_name[name]],
+            'forms': sorted(set().union(*(forms_by_name[name] for name in names))),
+            'languages': sorted(set().union(*(languages_by_name[name] for name in names))),
+            'fields': sum(name_counts[name] for name in names),
+        }
+        for field_id in clusters[cid]['field_ids']:
+            field_clusters[field_id] = cid
+
+    return field_clusters, clusters
+
+CLUSTER_FIELDNAMES = ['cluster_id', 'cluster_label', 'field_id', 'normalized_name', 'forms', 'languages']
+
+def write_cluster_csv(rows, output_file, threshold=DEFAULT_THRESHOLD):
+    """Write one row per field_id with its cluster, for joining against the enhanced CSV"""
+    rows = list(rows)
+    field_clusters, clusters = build_clusters(rows, threshold)
+
+    name_of_field = {row['field_id']: row['normalized_name'] for row in rows}
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=CLUSTER_FIELDNAMES)
+        writer.writeheader()
+        for cid in sorted(clusters):
+            cluster = clusters[cid]
+            for field_id in cluster['field_ids']:
+                writer.writerow({
+                    'cluster_id': cid,
+                    'cluster_label': cluster['label'],
+                    'field_id': field_id,
+                    'normalized_name': name_of_field[field_id],
+                    'forms': '|'.join(cluster['forms']),
+                    'languages': '|'.join(cluster['languages']),
+                })
+
+    cross_form = sum(1 for cluster in clusters.values() if len(cluster['forms']) > 1)
+    bilingual = sum(1 for cluster in clusters.values() if len(cluster['languages']) > 1)
+    print(f"✓ Field clusters created: {output_file}")
+    print(f"  {len(field_clusters)} field IDs in {len(clusters)} clusters "
+          f"({cross_form} span several forms, {bilingual} both languages)")
+    return field_clusters, clusters
+
+if __name__ == "__main__":
+    import os
+    import argparse
+    parser = argparse.ArgumentParser(description="Group enhanced form fields into cross-form clusters")
+    parser.add_argument("work_dir", nargs="?", default=os.getcwd(),
+                        help="Directory containing form_fields_enhanced.csv (default: current directory)")
+    parser.add_argument("-t", "--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Minimum Jaccard similarity of canonical tokens to merge names; "
+                             f"1.0 merges identical token sets only (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--db", metavar="PATH",
+                        help="Also load the clusters into a field store built with enhance_form_fields.py --db")
+    args = parser.parse_args()
+
+    with open(os.path.join(args.work_dir, 'form_fields_enhanced.csv'), 'r', encoding='utf-8') as f:
+        field_clusters, clusters = write_cluster_csv(
+            csv.DictReader(f), os.path.join(args.work_dir, 'form_fields_clusters.csv'), args.threshold
+        )
+
+    if args.db:
+        from field_store import FieldStore
+        with FieldStore(args.db) as store:
+            store.load_clusters(field_clusters, clusters)
+        print(f"✓ Field store updated: {args.db}")
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Indexed SQLite store for enhanced form fields
+Holds the same rows as form_fields_enhanced.csv, indexed on form_id,
+field_id, normalized_name, field_category and language, so lookups such as
+"all required fields for one form" don't rescan the whole CSV. CSV export
+reproduces the enhanced CSV byte for byte. An optional field_clusters table
+(see field_clusters.py) links fields that ask the same question across forms.
+"""
+
+import csv
+import sys
+import sqlite3
+import argparse
+from contextlib import contextmanager
+
+from enhance_form_fields import ENHANCED_FIELDNAMES
+
+# Index name suffix -> columns; form_id also covers "required fields of a form"
+INDEXES = {
+    'form_id': ('form_id', 'required'),
+    'field_id': ('field_id',),
+    'normalized_name': ('normalized_name',),
+    'field_category': ('field_category',),
+    'language': ('language',),
+}
+
+# Rows buffered per executemany call while loading
+LOAD_BATCH_ROWS = 5000
+
+class FieldStore:
+    """Enhanced form fields in a single-file SQLite database"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self._create_schema()
+
+    def _create_schema(self):
+        # position keeps the CSV row order for exports
+        columns = ', '.join(f'{name} TEXT NOT NULL' for name in ENHANCED_FIELDNAMES)
+        with self.conn:
+            self.conn.execute(f'CREATE TABLE IF NOT EXISTS fields (position INTEGER PRIMARY KEY, {columns})')
+            for name, indexed in INDEXES.items():
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_fields_{name} ON fields ({', '.join(indexed)})")
+            self.conn.execute('CREATE TABLE IF NOT EXISTS field_clusters '
+                              '(field_id TEXT PRIMARY KEY, cluster_id TEXT NOT NULL, cluster_label TEXT NOT NULL)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_field_clusters_cluster_id ON field_clusters (cluster_id)')
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM fields').fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @contextmanager
+    def loader(self):
+        """
+        Replace the stored fields with rows passed to the yielded callable
+        Everything happens in one transaction, so readers see either the old
+        table or the complete new one, and a failed load leaves it untouched.
+        """
+        insert = (f"INSERT INTO fields ({', '.join(ENHANCED_FIELDNAMES)}) "
+                  f"VALUES ({', '.join('?' for _ in ENHANCED_FIELDNAMES)})")
+        batch = []
+
+        def add(row):
+            batch.append([row[name] for name in ENHANCED_FIELDNAMES])
+            if len(batch) >= LOAD_BATCH_ROWS:
+                self.conn.executemany(insert, batch)
+                batch.clear()
+
+        with self.conn:
+            self.conn.execute('DELETE FROM fields')
+            yield add
+            if batch:
+                self.conn.executemany(insert, batch)
+
+    def load(self, rows):
+        """Replace the stored fields with rows (dicts keyed by ENHANCED_FIELDNAMES)"""
+        with self.loader() as add:
+            for row in rows:
+                add(row)
+
+    def import_csv(self, csv_path):
+        """Replace the stored fields with the rows of an enhanced CSV"""
+        with open(csv_path, 'r', encoding='utf-8') as f:
+            self.load(csv.DictReader(f))
+
+    def load_clusters(self, field_clusters, clusters):
+        """Replace the cluster table with the output of field_clusters.build_clusters"""
+        with self.conn:
+            self.conn.execute('DELETE FROM field_clusters')
+            self.conn.executemany(
+                'INSERT INTO field_clusters (field_id, cluster_id, cluster_label) VALUES (?, ?, ?)',
+                ((field_id, cid, clusters[cid]['label']) for field_id, cid in field_clusters.items())
+            )
+
+    def _where(self, filters):
+        clauses = []
+        params = []
+        for column, value in filters.items():
+            if column == 'cluster_id' and value is not None:
+                # Not a field column; match through the cluster table
+                clauses.append('field_id IN (SELECT field_id FROM field_clusters WHERE cluster_id = ?)')
+                params.append(value)
+                continue
+            if value is None:
+                continue
+            if column not in ENHANCED_FIELDNAMES:
+                raise ValueError(f"Unknown field column: {column}")
+            if isinstance(value, bool):
+                value = str(value)
+            if isinstance(value, (list, tuple, set)):
+                values = list(value)
+                clauses.append(f"{column} IN ({', '.join('?' for _ in values)})")
+                params.extend(values)
+            else:
+                clauses.append(f'{column} = ?')
+                params.append(value)
+        where = ' WHERE ' + ' AND '.join(clauses) if clauses else ''
+        return where, params
+
+    def iter_query(self, **filters):
+        """
+        Yield fields matching every filter, in CSV order
+
+        Filters are column=value pairs; a list/tuple/set value matches any of
+        its items, required accepts True/False, and cluster_id selects every
+        field in one cross-form cluster.
+        """
+        where, params = self._where(filters)
+        cursor = self.conn.execute(
+            f"SELECT {', '.join(ENHANCED_FIELDNAMES)} FROM fields{where} ORDER BY position", params
+        )
+        for row in cursor:
+            yield dict(row)
+
+    def query(self, **filters):
+        """Return the fields matching every filter as a list of dicts"""
+        return list(self.iter_query(**filters))
+
+    def fields_for_form(self, form_id, required=None):
+        """Return the fields of one form, optionally only required or optional ones"""
+        return self.query(form_id=form_id, required=required)
+
+    def cluster_of(self, field_id):
+        """Return (cluster_id, cluster_label) for a field, or None if unclustered"""
+        row = self.conn.execute(
+            'SELECT cluster_id, cluster_label FROM field_clusters WHERE field_id = ?', (field_id,)
+        ).fetchone()
+        return tuple(row) if row else None
+
+    def count_by(self, column, **filters):
+        """Return (value, count) pairs for a column, most common first"""
+        if column not in ENHANCED_FIELDNAMES:
+            raise ValueError(f"Unknown field column: {column}")
+        where, params = self._where(filters)
+        cursor = self.conn.execute(
+            f'SELECT {column}, COUNT(*) FROM fields{where} GROUP BY {column} '
+            f'ORDER BY COUNT(*) DESC, MIN(position)', params
+        )
+        return [tuple(row) for row in cursor]
+
+    def export_csv(self, output, **filters):
+        """Write matching fields as enhanced CSV to a path or open file; returns the row count"""
+        if isinstance(output, str):
+            with open(output, 'w', newline='', encoding='utf-8') as f:
+                return self.export_csv(f, **filters)
+
+        writer = csv.DictWriter(output, fieldnames=ENHANCED_FIELDNAMES)
+        writer.writeheader()
+        count = 0
+        for row in self.iter_query(**filters):
+            writer.writerow(row)
+            count += 1
+        return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query the indexed form field store")
+    parser.add_argument("db", help="SQLite database file")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Load an enhanced CSV into the store")
+    import_parser.add_argument("csv", help="Enhanced CSV, e.g. form_fields_enhanced.csv")
+
+    query_parser = subparsers.add_parser("query", help="Write matching fields as CSV (all fields if no filters)")
+    query_parser.add_argument("--form-id", action="append", help="Form ID, e.g. CPF-320-HVAC-INCENTIVE-ES (repeatable)")
+    query_parser.add_argument("--field-id", action="append", help="Field ID (repeatable)")
+    query_parser.add_argument("--normalized-name", action="append", help="Normalized field name (repeatable)")
+    query_parser.add_argument("--category", action="append", help="Field category (repeatable)")
+    query_parser.add_argument("--language", choices=["en", "es"])
+    query_parser.add_argument("--data-type", action="append", help="Data type (repeatable)")
+    query_parser.add_argument("--cluster-id", help="Every field in one cross-form cluster")
+    group = query_parser.add_mutually_exclusive_group()
+    group.add_argument("--required", dest="required", action="store_const", const=True,
+                       help="Only required fields")
+    group.add_argument("--optional", dest="required", action="store_const", const=False,
+                       help="Only optional fields")
+    query_parser.add_argument("-o", "--output", help="Write CSV here instead of stdout")
+    args = parser.parse_args()
+
+    with FieldStore(args.db) as store:
+        if args.command == "import":
+            store.import_csv(args.csv)
+            print(f"✓ Loaded {len(store)} fields into {args.db}")
+            return
+
+        filters = {
+            'form_id': args.form_id,
+            'field_id': args.field_id,
+            'normalized_name': args.normalized_name,
+            'field_category': args.category,
+            'language': args.language,
+            'data_type': args.data_type,
+            'required': args.required,
+            'cluster_id': args.cluster_id,
+        }
+        count = store.export_csv(args.output or sys.stdout, **filters)
+        print(f"{count} matching fields", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
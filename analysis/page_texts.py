@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Per-page text artifact shared by field extraction and fabric summarization
+Each PDF is parsed once, with the field extractor's reader (PyPDF2), into
+<pages_dir>/<pdf name>.json holding its SHA-256, the extractor version and
+the text of every page. extract_form_fields.py, extract_cpf_fields.py and
+pdf_fabric_processor.py read pages from there with --pages-dir instead of
+parsing the PDF again, so the field database and the fabric summaries are
+built from the same text. An entry is only used while the PDF's hash and the
+extractor version still match; otherwise the PDF is parsed and the entry
+rewritten, so the directory never needs clearing by hand.
+"""
+
+import os
+import json
+import tempfile
+from pathlib import Path
+
+from extraction_cache import file_digest
+from extract_form_fields import extract_page_texts, extract_texts_parallel, extractor_version
+
+class PageTexts:
+    """A directory of per-document page text artifacts"""
+
+    def __init__(self, pages_dir):
+        self.pages_dir = Path(pages_dir)
+        self.pages_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, pdf_path):
+        return self.pages_dir / f"{Path(pdf_path).name}.json"
+
+    def get(self, pdf_path, digest=None):
+        """Return the stored page texts of a PDF, or None if missing or stale"""
+        try:
+            with open(self._path(pdf_path), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get('extractor') != extractor_version():
+            return None
+        if entry.get('sha256') != (digest or file_digest(pdf_path)):
+            return None
+        return entry['pages']
+
+    def put(self, pdf_path, pages, digest=None):
+        """Store the page texts of a PDF"""
+        entry = {
+            'document': Path(pdf_path).name,
+            'sha256': digest or file_digest(pdf_path),
+            'extractor': extractor_version(),
+            'pages': pages
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.pages_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(pdf_path))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def pages(self, pdf_path, lazy=False):
+        """Return the page texts of a PDF, parsing and storing them if needed"""
+        digest = file_digest(pdf_path)
+        pages = self.get(pdf_path, digest)
+        if pages is None:
+            pages, error = extract_page_texts(pdf_path, lazy=lazy)
+            if error is not None:
+                raise ValueError(error)
+            self.put(pdf_path, pages, digest)
+        return pages
+
+def build_page_texts(pdf_files, page_texts, jobs=1, split_pages=0, lazy=False):
+    """
+    Parse every PDF without a current artifact, returning (parsed, reused, failed)
+    With jobs > 1, documents (and page ranges of documents longer than
+    split_pages) are parsed in a process pool, as in extract_documents.
+    """
+    digests = {pdf_path: file_digest(pdf_path) for pdf_path in pdf_files}
+    to_parse = [pdf_path for pdf_path in pdf_files if page_texts.get(pdf_path, digests[pdf_path]) is None]
+
+    if jobs > 1:
+        results = extract_texts_parallel(to_parse, jobs, split_pages, lazy)
+    else:
+        results = (extract_page_texts(pdf_path, lazy=lazy) for pdf_path in to_parse)
+
+    failed = 0
+    for pdf_path, (pages, error) in zip(to_parse, results):
+        if error is not None:
+            print(f"  Error processing {pdf_path.name}: {error}")
+            failed += 1
+            continue
+        page_texts.put(pdf_path, pages, digests[pdf_path])
+        print(f"Parsed: {pdf_path.name} ({len(pages)} pages)")
+
+    return len(to_parse) - failed, len(pdf_files) - len(to_parse), failed
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Parse PDFs once into per-page text shared by both extractors")
+    parser.add_argument("pdf_dir", help="Directory of PDFs")
+    parser.add_argument("pages_dir", help="Directory for the per-document page text files")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Worker processes for PDF extraction (default: 1, 0 = all CPUs)")
+    parser.add_argument("--split-pages", type=int, default=0, metavar="N",
+                        help="With --jobs, split documents longer than N pages across workers")
+    parser.add_argument("--lazy-pages", action="store_true",
+                        help="Release each page's objects once its text is extracted (lower memory, a little slower)")
+    args = parser.parse_args()
+
+    pdf_files = sorted(Path(args.pdf_dir).glob('*.pdf'))
+    parsed, reused, failed = build_page_texts(pdf_files, PageTexts(args.pages_dir),
+                                              args.jobs or os.cpu_count(), args.split_pages, args.lazy_pages)
+    print(f"✓ Page texts in {args.pages_dir}: {parsed} parsed, {reused} up to date, {failed} failed")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped PDF input shared by the extractors
+Readers get a read-only mmap of the file as their stream, so worker
+processes opening the same PDF share the operating system's page cache
+instead of each buffering their own copy, and only the parts of the file a
+reader touches are paged in. In lazy mode the reader also drops every object
+it resolved for a page once that page's text is out, so only the page being
+extracted (plus the page tree) stays resident. Large documents can be split
+into page ranges, each extracted by a separate worker with its own reader,
+and reassembled in page order.
+"""
+
+import os
+import mmap
+from contextlib import contextmanager
+
+class DocumentError(Exception):
+    """A PDF could not be read or yielded no text"""
+
+@contextmanager
+def mapped_pdf(pdf_path):
+    """Yield a read-only memory map of a PDF, usable as a reader's stream"""
+    with open(pdf_path, 'rb') as f:
+        # Empty files can't be mapped; let the reader reject the plain file
+        if os.fstat(f.fileno()).st_size == 0:
+            yield f
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as stream:
+            yield stream
+
+def page_count(reader_class, pdf_path):
+    """Return the number of pages in a PDF"""
+    with mapped_pdf(pdf_path) as stream:
+        return len(reader_class(stream).pages)
+
+def chunk_page_ranges(page_total, pages_per_task):
+    """Split page_total pages into [start, stop) ranges of at most pages_per_task pages"""
+    return [(start, min(start + pages_per_task, page_total))
+            for start in range(0, page_total, pages_per_task)]
+
+def _iter_reader_pages(reader, start, stop, lazy):
+    if stop is None:
+        stop = len(reader.pages)
+    resolved = getattr(reader, 'resolved_objects', None) if lazy else None
+    for i in range(start, stop):
+        yield reader.pages[i].extract_text()
+        if resolved is not None:
+            resolved.clear()
+
+def read_pages(reader_class, pdf_path, start=0, stop=None, lazy=False):
+    """
+    Yield the text of pages [start, stop) one page at a time
+    With lazy=True, objects resolved for a page (content streams, fonts,
+    images) are released after it is extracted; pages that share resources
+    re-read them, trading some time for a much lower peak.
+    """
+    with mapped_pdf(pdf_path) as stream:
+        yield from _iter_reader_pages(reader_class(stream), start, stop, lazy)
+
+def read_stream_pages(reader_class, stream, lazy=False):
+    """Yield the text of every page of a PDF already in a binary stream, such as an upload"""
+    return _iter_reader_pages(reader_class(stream), 0, None, lazy)
+
+def extract_range(reader_class, pdf_path, start, stop=None, lazy=False):
+    """Extract the text of pages [start, stop) with a reader of its own"""
+    return list(read_pages(reader_class, pdf_path, start, stop, lazy))
+
+def iter_texts_parallel(reader_class, pdf_path, executor, pages_per_task, lazy=False):
+    """
+    Yield every page's text, extracted in page ranges on a process pool
+    Ranges are yielded in page order as soon as each one and all before it
+    are done, so consumers can start on the first pages early.
+    """
+    ranges = chunk_page_ranges(page_count(reader_class, pdf_path), pages_per_task)
+    futures = [executor.submit(extract_range, reader_class, pdf_path, start, stop, lazy)
+               for start, stop in ranges]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Per-stage timing and counters for the extraction CLIs
+A Metrics object records wall and CPU time per stage, per document and per
+page, latency samples (e.g. fabric calls) with percentiles, cache hit rates
+and bytes processed. Stages nest: each stage is charged only its own time,
+so a classification stage that pulls pages from the parser doesn't count
+the parse time as well. --profile prints a summary and --metrics-out writes
+the full report as JSON.
+
+When profiling is off the CLIs use NULL_METRICS, whose methods do nothing
+and whose iterator wrappers hand back the iterable unchanged, so
+per-page and per-row loops run exactly as they would without it.
+"""
+
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+from collections import defaultdict
+from pathlib import Path
+
+METRICS_VERSION = 1
+
+PERCENTILES = (50, 90, 95, 99)
+
+_DONE = object()
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+class Metrics:
+    """Collects stage times, per-document records, latencies and counters"""
+
+    enabled = True
+
+    def __init__(self, command=None):
+        self.command = command
+        self.stages = {}
+        self.documents = []
+        self.latencies = defaultdict(list)
+        self.counters = defaultdict(int)
+        self.caches = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+
+    def _frames(self):
+        frames = getattr(self._local, 'frames', None)
+        if frames is None:
+            frames = self._local.frames = []
+        return frames
+
+    def _enter(self):
+        # [wall start, cpu start, wall in nested stages, cpu in nested stages]
+        self._frames().append([time.perf_counter(), time.thread_time(), 0.0, 0.0])
+
+    def _exit(self, name, record, count=1):
+        frames = self._frames()
+        wall_start, cpu_start, child_wall, child_cpu = frames.pop()
+        wall = time.perf_counter() - wall_start
+        cpu = time.thread_time() - cpu_start
+        if frames:
+            frames[-1][2] += wall
+            frames[-1][3] += cpu
+        wall -= child_wall
+        cpu -= child_cpu
+        with self._lock:
+            for totals in (self.stages, record['stages'] if record is not None else None):
+                if totals is None:
+                    continue
+                stage = totals.setdefault(name, {'count': 0, 'wall': 0.0, 'cpu': 0.0})
+                stage['count'] += count
+                stage['wall'] += wall
+                stage['cpu'] += cpu
+        return wall, cpu
+
+    @contextmanager
+    def stage(self, name, record=None):
+        """Time the enclosed block as one call of a stage, optionally also on a document record"""
+        self._enter()
+        try:
+            yield
+        finally:
+            self._exit(name, record)
+
+    def iter_timed(self, name, iterable, record=None):
+        """Yield from iterable, charging the time spent producing each item to a stage"""
+        iterator = iter(iterable)
+        while True:
+            self._enter()
+            item = _DONE
+            try:
+                item = next(iterator, _DONE)
+            finally:
+                self._exit(name, record, 0 if item is _DONE else 1)
+            if item is _DONE:
+                return
+            yield item
+
+    def pages(self, record, pages):
+        """Yield page texts, timing each one as the 'parse' stage and recording it on the document"""
+        iterator = iter(pages)
+        while True:
+            self._enter()
+            text = _DONE
+            try:
+                text = next(iterator, _DONE)
+            finally:
+                wall, cpu = self._exit('parse', record, 0 if text is _DONE else 1)
+            if text is _DONE:
+                return
+            if record is not None:
+                record['pages'] += 1
+                record['chars'] += len(text)
+                record['page_times'].append({'page': record['pages'], 'wall': wall, 'cpu': cpu, 'chars': len(text)})
+            yield text
+
+    @contextmanager
+    def document(self, name, path=None):
+        """Yield a record for one document, timing its total wall and CPU time"""
+        try:
+            size = Path(path).stat().st_size if path is not None else 0
+        except OSError:
+            size = 0
+        record = {'document': name, 'bytes': size, 'pages': 0, 'chars': 0,
+                  'wall': 0.0, 'cpu': 0.0, 'stages': {}, 'page_times': []}
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield record
+        finally:
+            record['wall'] = time.perf_counter() - wall_start
+            record['cpu'] = time.thread_time() - cpu_start
+            with self._lock:
+                self.documents.append(record)
+
+    def observe(self, name, seconds):
+        """Record one latency sample"""
+        with self._lock:
+            self.latencies[name].append(seconds)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def record_cache(self, name, cache):
+        """Record an ExtractionCache's hit and miss counts"""
+        if cache is not None:
+            self.caches[name] = {'hits': cache.hits, 'misses': cache.misses}
+
+    def report(self):
+        """Return everything recorded as a JSON-serializable dict"""
+        latency = {}
+        for name, samples in self.latencies.items():
+            ordered = sorted(samples)
+            latency[name] = {'count': len(ordered), 'mean': sum(ordered) / len(ordered), 'max': ordered[-1]}
+            latency[name].update({f'p{pct}': percentile(ordered, pct) for pct in PERCENTILES})
+
+        caches = {}
+        for name, counts in self.caches.items():
+            lookups = counts['hits'] + counts['misses']
+            caches[name] = dict(counts, hit_rate=counts['hits'] / lookups if lookups else None)
+
+        return {
+            'version': METRICS_VERSION,
+            'command': self.command,
+            'wall_seconds': time.perf_counter() - self._wall_start,
+            'cpu_seconds': time.process_time() - self._cpu_start,
+            'documents_processed': len(self.documents),
+            'pages_processed': sum(record['pages'] for record in self.documents),
+            'bytes_processed': sum(record['bytes'] for record in self.documents),
+            'chars_extracted': sum(record['chars'] for record in self.documents),
+            'stages': dict(sorted(self.stages.items(), key=lambda item: -item[1]['wall'])),
+            'latency': latency,
+            'caches': caches,
+            'counters': dict(self.counters),
+            'documents': self.documents,
+        }
+
+    def print_summary(self, report=None, file=sys.stderr):
+        """Print a stage/latency/cache summary of the report"""
+        report = report or self.report()
+        total = report['wall_seconds'] or 1
+        print(f"\nProfile: {report['wall_seconds']:.2f}s wall, {report['cpu_seconds']:.2f}s CPU, "
+              f"{report['documents_processed']} documents, {report['pages_processed']} pages, "
+              f"{report['bytes_processed'] / (1024 * 1024):.1f} MB", file=file)
+        print(f"  {'Stage':<14} {'Count':>8} {'Wall s':>9} {'CPU s':>9} {'Wall %':>7}", file=file)
+        for name, stage in report['stages'].items():
+            print(f"  {name:<14} {stage['count']:>8} {stage['wall']:>9.3f} {stage['cpu']:>9.3f} "
+                  f"{stage['wall'] / total:>7.1%}", file=file)
+        for name, stats in report['latency'].items():
+            print(f"  {name} latency: n={stats['count']} p50={stats['p50']:.3f}s p90={stats['p90']:.3f}s "
+                  f"p99={stats['p99']:.3f}s max={stats['max']:.3f}s", file=file)
+        for name, stats in report['caches'].items():
+            rate = f"{stats['hit_rate']:.0%}" if stats['hit_rate'] is not None else '-'
+            print(f"  {name} cache: {stats['hits']} hits, {stats['misses']} misses ({rate})", file=file)
+        slowest = sorted(report['documents'], key=lambda record: -record['wall'])[:5]
+        if slowest:
+            print("  Slowest documents:", file=file)
+            for record in slowest:
+                print(f"    {record['wall']:8.3f}s  {record['pages']:>4} pages  {record['document']}", file=file)
+
+class NullMetrics:
+    """Metrics that record nothing, for runs without profiling"""
+
+    enabled = False
+
+    def stage(self, name, record=None):
+        return nullcontext()
+
+    def iter_timed(self, name, iterable, record=None):
+        return iterable
+
+    def pages(self, record, pages):
+        return pages
+
+    def document(self, name, path=None):
+        return nullcontext()
+
+    def observe(self, name, seconds):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    def record_cache(self, name, cache):
+        pass
+
+NULL_METRICS = NullMetrics()
+
+def add_metrics_arguments(parser):
+    """Add the shared profiling options to an argparse parser"""
+    parser.add_argument("--profile", action="store_true",
+                        help="Print wall/CPU time per stage, latency percentiles and cache hit rates")
+    parser.add_argument("--metrics-out", metavar="PATH",
+                        help="Write per-stage, per-document and per-page timings as JSON")
+
+def metrics_from_args(args, command=None):
+    """Build a Metrics collector if profiling was requested, else NULL_METRICS"""
+    if args.profile or args.metrics_out:
+        return Metrics(command)
+    return NULL_METRICS
+
+def finish_metrics(metrics, args):
+    """Print and/or write the report, as requested on the command line"""
+    if not metrics.enabled:
+        return
+    report = metrics.report()
+    if args.profile:
+        metrics.print_summary(report)
+    if args.metrics_out:
+        with open(args.metrics_out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"✓ Metrics written: {args.metrics_out}", file=sys.stderr)
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Fabric stand-in - Check pdf_fabric_processor.py's --fabric-url mode without fabric or a model
+
+Provides a local stand-in for `fabric --serve` (POST /chat answered with
+server-sent events) and a matching stand-in `fabric` command. Both answer a
+call with a digest of its pattern, model and input, so the same run gives the
+same output either way. `compare` runs the processor once per mode against
+the stand-ins and checks that the outputs match.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shlex
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+PROCESSOR = Path(__file__).resolve().parent / "pdf_fabric_processor.py"
+# Answers are sent as several content events, as fabric streams them
+EVENT_CHARS = 16
+
+
+def standin_output(text: str, pattern: str, model: Optional[str] = None) -> str:
+    """Return the stand-in answer for one fabric call."""
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+    return f"[{pattern}{'/' + model if model else ''}] {len(text)} chars {digest}"
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """POST /chat in fabric's request format; GET /stats for request counts"""
+
+    protocol_version = "HTTP/1.1"
+    # Answer each request in one segment rather than waiting on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def _send(self, status: int, body: bytes, content_type: str, close: bool = False) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if close:
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/stats":
+            self._send(404, b"Not found", "text/plain")
+            return
+        self._send(200, json.dumps(self.server.stats()).encode("utf-8"), "application/json")
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path != "/chat":
+            self._send(404, b"Not found", "text/plain")
+            return
+        number = self.server.count_request()
+        close = bool(self.server.close_every) and number % self.server.close_every == 0
+        if self.server.fail_every and number % self.server.fail_every == 0:
+            self._send(503, b"Stand-in overload", "text/plain", close)
+            return
+        
+        try:
+            prompt = json.loads(body)["prompts"][0]
+            output = standin_output(prompt["userInput"], prompt["patternName"], prompt.get("model"))
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            self._send(400, f"Bad request: {e}".encode("utf-8"), "text/plain", close)
+            return
+        
+        events = [
+            {"type": "content", "format": "markdown", "content": output[i:i + EVENT_CHARS]}
+            for i in range(0, len(output), EVENT_CHARS)
+        ]
+        events.append({"type": "complete"})
+        payload = "".join(f"data: {json.dumps(event)}\n\n" for event in events).encode("utf-8")
+        self._send(200, payload, "text/event-stream", close)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class StandinServer(ThreadingHTTPServer):
+    """
+    A stand-in for `fabric --serve` on a local port.
+    
+    fail_every answers every Nth request with HTTP 503 and close_every closes
+    every Nth connection after its response, to exercise retries and stale
+    keep-alive connections.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        fail_every: int = 0,
+        close_every: int = 0,
+        verbose: bool = False
+    ):
+        self.fail_every = fail_every
+        self.close_every = close_every
+        self.verbose = verbose
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        super().__init__(address, StandinHandler)
+
+    def get_request(self):
+        request = super().get_request()
+        with self._lock:
+            self.connections += 1
+        return request
+
+    def count_request(self) -> int:
+        with self._lock:
+            self.requests += 1
+            return self.requests
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"requests": self.requests, "connections": self.connections}
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def run_standin_fabric(argv: List[str]) -> int:
+    """Act as the `fabric` command: read stdin, print the stand-in answer."""
+    parser = argparse.ArgumentParser(prog="fabric")
+    parser.add_argument("-p", "--pattern", required=True)
+    parser.add_argument("-m", "--model")
+    args = parser.parse_args(argv)
+    print(standin_output(sys.stdin.read(), args.pattern, args.model))
+    return 0
+
+
+def write_fabric_command(directory: Path) -> Path:
+    """Write an executable `fabric` into directory that runs the stand-in command."""
+    path = directory / "fabric"
+    path.write_text(
+        f"#!/bin/sh\nexec {shlex.quote(sys.executable)} {shlex.quote(str(Path(__file__).resolve()))} fabric \"$@\"\n",
+        encoding="utf-8"
+    )
+    path.chmod(path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+
+def run_processor(inputs: List[str], extra: List[str], env: dict) -> Tuple[List[dict], float]:
+    """Run pdf_fabric_processor.py in JSONL mode; returns (records, seconds)."""
+    command = [
+        sys.executable, str(PROCESSOR), *inputs, "--jsonl", "-", "--no-fabric-cache", "--no-journal", *extra
+    ]
+    started = time.perf_counter()
+    result = subprocess.run(command, capture_output=True, text=True, env=env)
+    elapsed = time.perf_counter() - started
+    if result.returncode not in (0, 1):
+        sys.stderr.write(result.stderr)
+        raise RuntimeError(f"pdf_fabric_processor.py exited with {result.returncode}")
+    return [json.loads(line) for line in result.stdout.splitlines() if line.strip()], elapsed
+
+
+def compare(
+    inputs: List[str],
+    extra: List[str],
+    fail_every: int = 0,
+    close_every: int = 0,
+    verbose: bool = False
+) -> bool:
+    """
+    Run the processor through the stand-in command and the stand-in server and compare.
+    
+    Args:
+        inputs: PDF files, directories or glob patterns to process
+        extra: Further pdf_fabric_processor.py options for both runs
+        fail_every: Answer every Nth server request with HTTP 503
+        close_every: Close every Nth server connection after its response
+        verbose: Log every server request
+    
+    Returns:
+        True if both runs produced the same records
+    """
+    server = StandinServer(("127.0.0.1", 0), fail_every, close_every, verbose)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with tempfile.TemporaryDirectory() as bin_dir:
+            write_fabric_command(Path(bin_dir))
+            env = dict(os.environ, PATH=bin_dir + os.pathsep + os.environ.get("PATH", ""))
+            process_records, process_seconds = run_processor(inputs, extra, env)
+            server_records, server_seconds = run_processor(
+                inputs, extra + ["--fabric-url", server.url, "--backoff", "0"], env
+            )
+        stats = server.stats()
+    finally:
+        server.shutdown()
+        server.server_close()
+    
+    print(f"fabric processes: {len(process_records)} documents in {process_seconds:.2f}s", file=sys.stderr)
+    print(f"--fabric-url:     {len(server_records)} documents in {server_seconds:.2f}s "
+          f"({stats['requests']} requests on {stats['connections']} connections)", file=sys.stderr)
+    
+    if process_records == server_records:
+        print(f"✓ Outputs match ({sum(r['error'] is None for r in server_records)} succeeded, "
+              f"{sum(r['error'] is not None for r in server_records)} failed in both)", file=sys.stderr)
+        return True
+    
+    mismatched = [
+        a["document"] for a, b in zip(process_records, server_records) if a != b
+    ]
+    if len(process_records) != len(server_records):
+        print(f"✗ Record counts differ: {len(process_records)} vs {len(server_records)}", file=sys.stderr)
+    for document in mismatched:
+        print(f"✗ Outputs differ: {document}", file=sys.stderr)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Stand-ins for fabric and `fabric --serve`, to check pdf_fabric_processor.py --fabric-url",
+        epilog="""
+Examples:
+  # Compare subprocess and --fabric-url runs over the program PDFs
+  %(prog)s compare program-docs -- --parallel 8 --chunk-tokens 3000
+
+  # Same, with every 7th request failing and every 5th connection dropped
+  %(prog)s compare program-docs --fail-every 7 --close-every 5 -- --parallel 8
+
+  # Serve the stand-in for manual runs
+  %(prog)s serve --port 8080
+        """,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    serve = commands.add_parser("serve", help="Run the stand-in /chat server")
+    serve.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    serve.add_argument("--port", type=int, default=8080, help="Port to listen on (default: 8080)")
+    
+    check = commands.add_parser(
+        "compare",
+        help="Compare subprocess and --fabric-url runs",
+        description="Compare subprocess and --fabric-url runs; options after -- go to both pdf_fabric_processor.py runs"
+    )
+    check.add_argument("inputs", nargs="+", help="PDF files, directories or glob patterns")
+    check.add_argument("-p", "--pattern", default="summarize", help="Pattern for both runs (default: summarize)")
+    
+    for command in (serve, check):
+        command.add_argument("--fail-every", type=int, default=0, help="Answer every Nth request with HTTP 503")
+        command.add_argument("--close-every", type=int, default=0,
+                             help="Close every Nth connection after its response")
+        command.add_argument("-v", "--verbose", action="store_true", help="Log every request")
+    
+    commands.add_parser("fabric", help="Act as the fabric command (used by compare)", add_help=False)
+    
+    if len(sys.argv) > 1 and sys.argv[1] == "fabric":
+        sys.exit(run_standin_fabric(sys.argv[2:]))
+    
+    # Everything after -- belongs to pdf_fabric_processor.py
+    argv = sys.argv[1:]
+    extra = []
+    if "--" in argv:
+        argv, extra = argv[:argv.index("--")], argv[argv.index("--") + 1:]
+    args = parser.parse_args(argv)
+    
+    if args.command == "serve":
+        server = StandinServer((args.host, args.port), args.fail_every, args.close_every, args.verbose)
+        print(f"✓ Stand-in fabric server on {server.url}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return
+    
+    try:
+        matched = compare(args.inputs, ["--pattern", args.pattern] + extra, args.fail_every, args.close_every,
+                          args.verbose)
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(2)
+    if not matched:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,58 +4,704 @@ PDF Fabric Processor - Iteratively extract and process PDF content with fabric p
 """
 
 import argparse
+import glob
+import hashlib
+import http.client
+import json
+import os
+import re
 import subprocess
 import sys
 import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
 
-try:
+sys.path.insert(0, str(Path(__file__).resolve().parent / "analysis"))
+from extraction_cache import (
+    DEFAULT_CACHE_DIR, DEFAULT_MAX_MB, ExtractionCache, add_cache_arguments, cache_from_args, file_digest
+)
+from page_texts import PageTexts
+from pdf_input import DocumentError, iter_texts_parallel, read_pages
+from run_metrics import NULL_METRICS, Metrics, add_metrics_arguments, finish_metrics, metrics_from_args
+
+DEFAULT_FABRIC_CACHE_DIR = os.path.join(DEFAULT_CACHE_DIR, "fabric")
+DEFAULT_JOURNAL_DIR = os.path.join(DEFAULT_CACHE_DIR, "fabric-journal")
+DEFAULT_JOURNAL_MAX_MB = 64
+DEFAULT_PAGES_PER_TASK = 8
+# Rough characters per model token, for English and Spanish prose
+CHARS_PER_TOKEN = 4
+PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n")
+
+
+# pypdf is only imported once a PDF is read, so importing this module stays cheap
+def pdf_reader_class() -> type:
+    """Return pypdf's PdfReader."""
     import pypdf
-except ImportError:
-    print("Error: pypdf is required. Install with: pip install pypdf", file=sys.stderr)
-    sys.exit(1)
+    return pypdf.PdfReader
 
 
-def extract_pdf_text(pdf_path: Path) -> List[str]:
-    """Extract text from PDF, returning a list of pages."""
+def extractor_version() -> str:
+    """Return the PDF library and version that cached page texts came from."""
+    import pypdf
+    return f"pypdf-{pypdf.__version__}"
+
+
+class PageExtractor:
+    """
+    Extracts page text on a process pool, splitting each document into page ranges.
+    
+    Every range gets its own reader on a memory map of the file, so one long
+    document is spread across all workers instead of running on one. Pages
+    come back in order. With jobs=1 pages are read in-process. With lazy=True
+    readers release each page's objects once its text is extracted. With
+    page_texts, pages come from the artifact shared with the field extractor.
+    """
+
+    def __init__(
+        self,
+        jobs: int,
+        pages_per_task: int = DEFAULT_PAGES_PER_TASK,
+        lazy: bool = False,
+        page_texts: Optional[PageTexts] = None
+    ):
+        self.pages_per_task = max(1, pages_per_task)
+        self.lazy = lazy
+        self.page_texts = page_texts
+        self.executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+
+    def iter_pages(self, pdf_path: Path) -> Iterator[str]:
+        """Yield the text of every page of a PDF, in page order."""
+        if self.executor is None:
+            return read_pages(pdf_reader_class(), pdf_path, lazy=self.lazy)
+        return iter_texts_parallel(pdf_reader_class(), pdf_path, self.executor, self.pages_per_task, self.lazy)
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+    def __enter__(self) -> "PageExtractor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def iter_pdf_text(
+    pdf_path: Path,
+    cache: Optional[ExtractionCache] = None,
+    extractor: Optional[PageExtractor] = None
+) -> Iterator[str]:
+    """Yield the text of each non-blank page of a PDF, reading pages lazily."""
     try:
-        reader = pypdf.PdfReader(pdf_path)
-        pages = []
-        for page_num, page in enumerate(reader.pages, 1):
-            text = page.extract_text()
+        if extractor is not None and extractor.page_texts is not None:
+            # The same (PyPDF2) text the field extractor builds its fields from
+            yield from (text for text in extractor.page_texts.pages(pdf_path, extractor.lazy) if text.strip())
+            return
+        
+        entry = None
+        if cache is not None:
+            key = cache.key(file_digest(pdf_path), extractor_version())
+            entry = cache.get(key)
+        
+        if entry is not None:
+            yield from (text for text in entry["pages"] if text.strip())
+            return
+        
+        # Page texts are only retained if they are going into the cache
+        all_pages = [] if cache is not None else None
+        if extractor is not None:
+            texts = extractor.iter_pages(pdf_path)
+        else:
+            # A memory map, so the reader doesn't copy the whole file into memory
+            texts = read_pages(pdf_reader_class(), pdf_path)
+        for text in texts:
+            if all_pages is not None:
+                all_pages.append(text)
             if text.strip():
-                pages.append(text)
-        return pages
+                yield text
+        
+        if cache is not None:
+            cache.put(key, {"extractor": extractor_version(), "pages": all_pages})
     except Exception as e:
-        print(f"Error reading PDF: {e}", file=sys.stderr)
-        sys.exit(1)
+        raise DocumentError(f"Error reading PDF: {e}")
+
+
+def extract_pdf_text(
+    pdf_path: Path,
+    cache: Optional[ExtractionCache] = None,
+    extractor: Optional[PageExtractor] = None
+) -> List[str]:
+    """Extract text from PDF, returning a list of non-blank pages."""
+    return list(iter_pdf_text(pdf_path, cache, extractor))
 
 
-def run_fabric_pattern(text: str, pattern: str) -> str:
-    """Run a fabric pattern on the given text."""
+def estimate_tokens(text: str) -> int:
+    """Estimate the model tokens in text from its length."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def split_text(text: str, max_tokens: int) -> List[str]:
+    """
+    Split text into pieces of at most about max_tokens tokens.
+    
+    Paragraphs are kept together where they fit; a longer paragraph is split
+    between lines, and a single overlong line at whitespace (or, failing
+    that, at the character limit).
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return [text]
+    
+    units = []
+    for paragraph in PARAGRAPH_BREAK.split(text):
+        if len(paragraph) <= max_chars:
+            units.append((paragraph, "\n\n"))
+            continue
+        for line in paragraph.split("\n"):
+            while len(line) > max_chars:
+                cut = line.rfind(" ", 0, max_chars + 1)
+                if cut <= 0:
+                    cut = max_chars
+                units.append((line[:cut], "\n"))
+                line = line[cut:].lstrip(" ")
+            units.append((line, "\n"))
+        units[-1] = (units[-1][0], "\n\n")
+    
+    # Greedily pack the units back together, rejoining with their original break
+    pieces = []
+    current = ""
+    separator = ""
+    for unit, unit_separator in units:
+        if current and len(current) + len(separator) + len(unit) > max_chars:
+            pieces.append(current)
+            current = unit
+        else:
+            current = current + separator + unit if current else unit
+        separator = unit_separator
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def iter_chunks(
+    pages: Iterable[str],
+    chunk_size: int = 1,
+    chunk_tokens: int = 0
+) -> Iterator[Tuple[int, int, List[str]]]:
+    """
+    Group page texts into fabric chunks, yielding (first_page, last_page, pieces).
+    
+    By default every chunk_size pages make a chunk. With chunk_tokens, pages
+    are instead packed until the next one would take the chunk past about
+    chunk_tokens estimated tokens, and a page longer than that is split at
+    paragraph breaks into chunks of its own, so short pages share a call and
+    dense ones no longer overflow the model.
+    """
+    if chunk_size < 1 or chunk_tokens < 0:
+        raise ValueError(f"Invalid chunking: chunk_size={chunk_size}, chunk_tokens={chunk_tokens}")
+    chunk = []
+    first_page = 1
+    page_num = 0
+    if not chunk_tokens:
+        for page_num, text in enumerate(pages, 1):
+            chunk.append(text)
+            if len(chunk) == chunk_size:
+                yield first_page, page_num, chunk
+                chunk = []
+                first_page = page_num + 1
+        if chunk:
+            yield first_page, page_num, chunk
+        return
+    
+    tokens = 0
+    last_page = 0
+    for page_num, text in enumerate(pages, 1):
+        for piece in split_text(text, chunk_tokens):
+            piece_tokens = estimate_tokens(piece)
+            if chunk and tokens + piece_tokens > chunk_tokens:
+                yield first_page, last_page, chunk
+                chunk = []
+                tokens = 0
+            if not chunk:
+                first_page = page_num
+            chunk.append(piece)
+            tokens += piece_tokens
+            last_page = page_num
+    if chunk:
+        yield first_page, last_page, chunk
+
+
+class FabricError(Exception):
+    """A fabric call failed; retryable errors may succeed if attempted again."""
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def fabric_command(pattern: str, model: Optional[str] = None) -> List[str]:
+    """Build the fabric command line for a pattern and optional model."""
+    command = ["fabric", "--pattern", pattern]
+    if model:
+        command += ["--model", model]
+    return command
+
+
+def run_fabric_pattern(
+    text: str,
+    pattern: str,
+    timeout: Optional[float] = None,
+    model: Optional[str] = None
+) -> str:
+    """Run a fabric pattern on the given text, raising FabricError on failure."""
     try:
         result = subprocess.run(
-            ["fabric", "--pattern", pattern],
+            fabric_command(pattern, model),
             input=text,
             capture_output=True,
             text=True,
-            check=True
+            check=True,
+            timeout=timeout
         )
         return result.stdout.strip()
     except subprocess.CalledProcessError as e:
-        print(f"Error running fabric pattern '{pattern}': {e.stderr}", file=sys.stderr)
-        sys.exit(1)
+        raise FabricError(f"Error running fabric pattern '{pattern}': {e.stderr}")
+    except subprocess.TimeoutExpired:
+        raise FabricError(f"Error running fabric pattern '{pattern}': timed out after {timeout}s")
     except FileNotFoundError:
-        print("Error: 'fabric' command not found. Make sure fabric is installed.", file=sys.stderr)
-        sys.exit(1)
+        raise FabricError("Error: 'fabric' command not found. Make sure fabric is installed.",
+                          retryable=False)
+
+
+class FabricServer:
+    """
+    Runs fabric patterns through a running `fabric --serve` REST server.
+    
+    Calls go to the server's /chat endpoint over persistent HTTP/1.1
+    connections, kept in a pool of up to pool_size idle connections, so
+    each call skips fabric's process startup, config load and connection
+    setup. run_pattern takes the same arguments and raises the same
+    FabricError as run_fabric_pattern.
+    """
+
+    # Dropped keep-alive connections fail like this before any response is read
+    STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+    def __init__(self, url: str, pool_size: int = 1, metrics: Optional[Metrics] = None):
+        parts = urlsplit(url if "://" in url else f"http://{url}")
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Invalid fabric server URL: {url}")
+        self.url = url
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = parts.path.rstrip("/") + "/chat"
+        self.pool_size = max(1, pool_size)
+        self.metrics = metrics or NULL_METRICS
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def available(self, timeout: float = 2.0) -> bool:
+        """Return whether the server accepts connections."""
+        connection = self.connection_class(self.host, self.port, timeout=timeout)
+        try:
+            connection.connect()
+            return True
+        except OSError:
+            return False
+        finally:
+            connection.close()
+
+    def _checkout(self, timeout: Optional[float]) -> Tuple[http.client.HTTPConnection, bool]:
+        """Take an idle connection, or open a new one; returns (connection, reused)."""
+        with self._lock:
+            connection = self._idle.pop() if self._idle else None
+        if connection is None:
+            self.metrics.count("fabric_connections")
+            connection = self.connection_class(self.host, self.port, timeout=timeout)
+            reused = False
+        else:
+            reused = True
+        connection.timeout = timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+        return connection, reused
+
+    def _checkin(self, connection: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def run_pattern(
+        self,
+        text: str,
+        pattern: str,
+        timeout: Optional[float] = None,
+        model: Optional[str] = None
+    ) -> str:
+        """Run a fabric pattern on the given text, raising FabricError on failure."""
+        body = json.dumps({
+            "prompts": [{"userInput": text, "patternName": pattern, "model": model or ""}]
+        }).encode("utf-8")
+        headers = {"Content-Type": "application/json", "Accept": "text/event-stream"}
+        
+        for attempt in range(2):
+            connection, reused = self._checkout(timeout)
+            try:
+                connection.request("POST", self.path, body, headers)
+                response = connection.getresponse()
+                payload = response.read()
+            except self.STALE_CONNECTION_ERRORS as e:
+                connection.close()
+                if reused and attempt == 0:
+                    # The server closed an idle connection; retry once on a fresh one
+                    continue
+                raise FabricError(f"Error running fabric pattern '{pattern}': {e}")
+            except TimeoutError:
+                connection.close()
+                raise FabricError(f"Error running fabric pattern '{pattern}': timed out after {timeout}s")
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                raise FabricError(f"Error running fabric pattern '{pattern}': {e}")
+            
+            if response.will_close:
+                connection.close()
+            else:
+                self._checkin(connection)
+            
+            if response.status != 200:
+                # Client errors won't succeed on a retry; overload and server errors might
+                raise FabricError(
+                    f"Error running fabric pattern '{pattern}': HTTP {response.status} "
+                    f"{payload.decode('utf-8', 'replace').strip()}",
+                    retryable=response.status == 429 or response.status >= 500
+                )
+            return self._read_output(payload, pattern)
+
+    @staticmethod
+    def _read_output(payload: bytes, pattern: str) -> str:
+        """Join the content of a /chat response's server-sent events."""
+        output = []
+        for line in payload.decode("utf-8").splitlines():
+            if not line.startswith("data:"):
+                continue
+            try:
+                event = json.loads(line[5:])
+            except ValueError:
+                continue
+            if event.get("type") == "error":
+                raise FabricError(f"Error running fabric pattern '{pattern}': {event.get('content')}")
+            if event.get("type") == "content":
+                output.append(event.get("content", ""))
+        return "".join(output).strip()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+class DocumentJournal:
+    """
+    Append-only record of the fabric outputs for one document and pattern.
+    
+    Each completed call is appended as a JSON line keyed on the SHA-256 of its
+    input text. Once the document is done the journal is rewritten to hold
+    only its final output. A line cut short by an interruption is ignored
+    when the journal is read.
+    """
+
+    def __init__(self, path: Path, resume: bool = False):
+        self.path = path
+        self.outputs = {}
+        self.final = None
+        self._lock = threading.Lock()
+        if resume and path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if "final" in entry:
+                        self.final = entry["final"]
+                    else:
+                        self.outputs[entry["input"]] = entry["output"]
+        else:
+            # A fresh run starts a fresh journal
+            path.write_text("", encoding="utf-8")
+
+    def get(self, digest: str) -> Optional[str]:
+        return self.outputs.get(digest)
+
+    def _append(self, entry: dict) -> None:
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def put(self, digest: str, output: str) -> None:
+        self.outputs[digest] = output
+        self._append({"input": digest, "output": output})
+
+    def finish(self, output: str) -> None:
+        """Replace the journaled call outputs with the document's final output."""
+        self.final = output
+        self.outputs = {}
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"final": output}, ensure_ascii=False) + "\n")
+            with self._lock:
+                os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def discard(self) -> None:
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class FabricJournal:
+    """
+    A directory of DocumentJournals, one per document path, content hash, pattern and model.
+    
+    Every chunk and aggregation result is journaled as it completes. With
+    resume, a rerun reuses them: finished documents return their final output
+    without being read, and unfinished ones only call fabric for the inputs
+    that are missing. A finished document's journal shrinks to its final
+    output, and a document that can't be processed at all (DocumentError)
+    drops its journal, so only fabric failures and interruptions leave work
+    to resume. If none are left when the run ends, its journals are removed.
+    
+    The fabric result cache already memoizes each call, but it is shared,
+    evicted by size and can be turned off, and it can't tell which
+    documents are finished. The journal is what lets --resume skip a
+    finished document without reading its PDF, and keeps an interrupted
+    run's results even with --no-fabric-cache. Journals left behind are
+    trimmed least-recently-used past max_bytes, like the caches.
+    
+    Keys include the resolved path, so identical PDFs under different names
+    keep separate journals. A path given twice in one run shares a single
+    DocumentJournal and stays unfinished until every copy has settled.
+    """
+
+    def __init__(
+        self,
+        journal_dir: str,
+        resume: bool = False,
+        max_bytes: int = DEFAULT_JOURNAL_MAX_MB * 1024 * 1024
+    ):
+        self.journal_dir = Path(journal_dir)
+        # Only used to evict old journals; entries are written by DocumentJournal
+        self.store = ExtractionCache(journal_dir, max_bytes, suffix=".jsonl")
+        self.resume = resume
+        self.documents = {}
+        # Journal path -> number of opens that haven't settled yet
+        self.unfinished = {}
+        self._lock = threading.Lock()
+
+    def open(self, pdf_path: Path, pattern: str, model: Optional[str] = None) -> DocumentJournal:
+        key = hashlib.sha256(
+            json.dumps([str(pdf_path.resolve()), file_digest(pdf_path), fabric_command(pattern, model)])
+            .encode("utf-8")
+        ).hexdigest()
+        path = self.journal_dir / f"{key}.jsonl"
+        with self._lock:
+            document = self.documents.get(path)
+            if document is None:
+                document = self.documents[path] = DocumentJournal(path, self.resume)
+            self.unfinished[path] = self.unfinished.get(path, 0) + 1
+        return document
+
+    def settle(self, document: DocumentJournal, output: Optional[str] = None) -> None:
+        """Record that a document reached a terminal state: finished with output, or discarded without."""
+        with self._lock:
+            if output is None:
+                document.discard()
+            elif document.final is None:
+                document.finish(output)
+            self.unfinished[document.path] -= 1
+            if not self.unfinished[document.path]:
+                del self.unfinished[document.path]
+
+    def close(self) -> bool:
+        """End the run's journaling; returns True if journals were kept for --resume."""
+        if self.unfinished:
+            self.store.evict()
+            return any(path.exists() for path in self.unfinished)
+        for path in self.documents:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        self.store.evict()
+        return False
+
+
+class FabricRunner:
+    """
+    Runs fabric calls on a bounded thread pool.
+    
+    Each call gets its own timeout and is retried with exponential backoff,
+    so one slow or flaky chunk does not hold up or sink the whole document.
+    With a result cache, outputs are memoized on the pattern, model and a
+    hash of the exact input, so unchanged chunks never reach fabric again.
+    With metrics, the latency of every fabric call is recorded. With a
+    FabricServer, calls go to `fabric --serve` instead of a new fabric
+    process each.
+    """
+
+    def __init__(
+        self,
+        parallel: int = 1,
+        timeout: Optional[float] = None,
+        retries: int = 2,
+        backoff: float = 1.0,
+        verbose: bool = False,
+        model: Optional[str] = None,
+        result_cache: Optional[ExtractionCache] = None,
+        metrics: Optional[Metrics] = None,
+        server: Optional[FabricServer] = None
+    ):
+        self.timeout = timeout
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.verbose = verbose
+        self.model = model
+        self.result_cache = result_cache
+        self.metrics = metrics or NULL_METRICS
+        self.server = server
+        self.parallel = max(1, parallel)
+        self.executor = ThreadPoolExecutor(max_workers=self.parallel)
+
+    def run(self, text: str, pattern: str, journal: Optional[DocumentJournal] = None) -> str:
+        """Run a fabric pattern, using the document journal and result cache when possible."""
+        if journal is None:
+            return self._run_cached(text, pattern)
+        
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        output = journal.get(digest)
+        if output is not None:
+            self.metrics.count("journal_hits")
+            return output
+        
+        output = self._run_cached(text, pattern, digest)
+        journal.put(digest, output)
+        return output
+
+    def _run_cached(self, text: str, pattern: str, digest: Optional[str] = None) -> str:
+        """Run a fabric pattern, using the result cache when possible."""
+        if self.result_cache is None:
+            return self._run_with_retries(text, pattern)
+        
+        key = self.result_cache.key(
+            digest or hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            json.dumps(fabric_command(pattern, self.model))
+        )
+        entry = self.result_cache.get(key)
+        if entry is not None:
+            return entry["output"]
+        
+        output = self._run_with_retries(text, pattern)
+        self.result_cache.put(key, {"pattern": pattern, "model": self.model, "output": output})
+        return output
+
+    def _run_with_retries(self, text: str, pattern: str) -> str:
+        """Run a fabric pattern, retrying retryable failures with backoff."""
+        self.metrics.count("fabric_input_chars", len(text))
+        for attempt in range(self.retries + 1):
+            try:
+                return self._call(text, pattern)
+            except FabricError as e:
+                self.metrics.count("fabric_failures")
+                if not e.retryable or attempt == self.retries:
+                    raise
+                delay = self.backoff * (2 ** attempt)
+                if self.verbose:
+                    print(f"{e} - retrying in {delay:g}s", file=sys.stderr)
+                time.sleep(delay)
+
+    def _call(self, text: str, pattern: str) -> str:
+        """Make a single fabric call, recording its latency."""
+        started = time.perf_counter()
+        try:
+            if self.server is not None:
+                return self.server.run_pattern(text, pattern, self.timeout, self.model)
+            return run_fabric_pattern(text, pattern, self.timeout, self.model)
+        finally:
+            self.metrics.observe("fabric_call", time.perf_counter() - started)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        if self.server is not None:
+            self.server.close()
+
+    def __enter__(self) -> "FabricRunner":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def aggregate_results(
+    results: List[str],
+    pattern: str,
+    runner: FabricRunner,
+    fan_in: int = 0,
+    verbose: bool = False,
+    journal: Optional[DocumentJournal] = None
+) -> str:
+    """
+    Reduce chunk results to a single output with a fabric pattern.
+    
+    With fan_in K > 1, results are aggregated K at a time, level by level,
+    until at most K remain for the final pass. Each level's groups run in
+    parallel on the runner, so both latency and per-call input size grow
+    logarithmically with the number of chunks. With fan_in 0, all results
+    go into one final call. Every call goes through the document's journal,
+    if given.
+    """
+    level = 1
+    while fan_in > 1 and len(results) > fan_in:
+        groups = [results[i:i + fan_in] for i in range(0, len(results), fan_in)]
+        
+        if verbose:
+            print(f"Aggregation level {level}: {len(results)} results in {len(groups)} groups...", file=sys.stderr)
+        
+        # A trailing single result passes through to the next level unchanged
+        futures = [
+            runner.executor.submit(runner.run, "\n\n---\n\n".join(group), pattern, journal) if len(group) > 1 else None
+            for group in groups
+        ]
+        results = [future.result() if future else group[0] for future, group in zip(futures, groups)]
+        level += 1
+    
+    if verbose:
+        print(f"Aggregating {len(results)} results...", file=sys.stderr)
+    
+    return runner.run("\n\n---\n\n".join(results), pattern, journal)
 
 
 def process_pdf_with_fabric(
     pdf_path: Path,
     pattern: str,
     chunk_size: int = 1,
-    verbose: bool = False
+    verbose: bool = False,
+    cache: Optional[ExtractionCache] = None,
+    runner: Optional[FabricRunner] = None,
+    fan_in: int = 0,
+    extractor: Optional[PageExtractor] = None,
+    chunk_tokens: int = 0,
+    journal: Optional[FabricJournal] = None
 ) -> str:
     """
     Process a PDF with a fabric pattern iteratively.
@@ -65,48 +711,207 @@ def process_pdf_with_fabric(
         pattern: Fabric pattern name to apply
         chunk_size: Number of pages to process at once
         verbose: Print progress information
+        cache: Extraction cache for page text, or None to always parse
+        runner: FabricRunner that executes chunk calls (default: serial); its
+            metrics record per-document and per-page timings
+        fan_in: Aggregate this many results per call, level by level (0 = one final call)
+        extractor: PageExtractor for page-parallel text extraction (default: serial)
+        chunk_tokens: Pack pages into chunks of about this many tokens instead of chunk_size pages
+        journal: FabricJournal that records each result as it completes, for --resume
     
     Returns:
         Final aggregated output
     """
-    if verbose:
-        print(f"Extracting text from {pdf_path}...", file=sys.stderr)
-    
-    pages = extract_pdf_text(pdf_path)
-    
-    if not pages:
-        print("Error: No text extracted from PDF", file=sys.stderr)
-        sys.exit(1)
-    
-    if verbose:
-        print(f"Extracted {len(pages)} pages", file=sys.stderr)
+    if runner is None:
+        with FabricRunner(verbose=verbose) as runner:
+            return process_pdf_with_fabric(
+                pdf_path, pattern, chunk_size, verbose, cache, runner, fan_in, extractor, chunk_tokens, journal
+            )
     
-    # Process pages in chunks
-    chunk_results = []
-    total_chunks = (len(pages) + chunk_size - 1) // chunk_size
+    doc_journal = None
+    if journal is not None:
+        try:
+            doc_journal = journal.open(pdf_path, pattern, runner.model)
+        except OSError as e:
+            raise DocumentError(f"Error reading PDF: {e}")
+        if doc_journal.final is not None:
+            if verbose:
+                print(f"Resumed {pdf_path}: already complete", file=sys.stderr)
+            journal.settle(doc_journal, doc_journal.final)
+            return doc_journal.final
+        if verbose and doc_journal.outputs:
+            print(f"Resuming {pdf_path}: {len(doc_journal.outputs)} results journaled", file=sys.stderr)
+        try:
+            output = _process_pdf(pdf_path, pattern, chunk_size, verbose, cache, runner, fan_in, extractor,
+                                  chunk_tokens, doc_journal)
+        except DocumentError:
+            # Rerunning won't help, so there's nothing worth resuming
+            journal.settle(doc_journal)
+            raise
+        journal.settle(doc_journal, output)
+        return output
     
-    for i in range(0, len(pages), chunk_size):
-        chunk = pages[i:i + chunk_size]
-        chunk_num = (i // chunk_size) + 1
+    return _process_pdf(pdf_path, pattern, chunk_size, verbose, cache, runner, fan_in, extractor, chunk_tokens)
+
+
+def _process_pdf(
+    pdf_path: Path,
+    pattern: str,
+    chunk_size: int,
+    verbose: bool,
+    cache: Optional[ExtractionCache],
+    runner: FabricRunner,
+    fan_in: int,
+    extractor: Optional[PageExtractor],
+    chunk_tokens: int,
+    doc_journal: Optional[DocumentJournal] = None
+) -> str:
+    """Extract, chunk and run one PDF through fabric (see process_pdf_with_fabric)."""
+    metrics = runner.metrics
+    with metrics.document(pdf_path.name, pdf_path) as record:
+        if verbose:
+            print(f"Extracting text from {pdf_path}...", file=sys.stderr)
+        
+        # Pages stream from the reader into chunks, and each chunk is submitted as
+        # soon as it is complete. At most two chunks per worker are held at once,
+        # so memory stays flat however long the document is.
+        in_flight = threading.BoundedSemaphore(2 * runner.parallel)
+        
+        def run_chunk(chunk_num: int, first_page: int, last_page: int, chunk: List[str]) -> str:
+            try:
+                if verbose:
+                    print(f"Processing chunk {chunk_num} (pages {first_page}-{last_page})...", file=sys.stderr)
+                
+                # Combine pages (or pieces of pages) in chunk
+                combined_text = "\n\n".join(chunk)
+                
+                # Run fabric pattern on chunk
+                return runner.run(combined_text, pattern, doc_journal)
+            finally:
+                in_flight.release()
+        
+        # Chunks run concurrently on the runner's pool; results are collected in page order
+        futures = []
+        page_count = 0
+        pages = metrics.pages(record, iter_pdf_text(pdf_path, cache, extractor))
+        for first_page, page_count, chunk in iter_chunks(pages, chunk_size, chunk_tokens):
+            with metrics.stage("fabric_wait", record):
+                in_flight.acquire()
+            futures.append(runner.executor.submit(run_chunk, len(futures) + 1, first_page, page_count, chunk))
+        metrics.count("fabric_chunks", len(futures))
+        
+        if not page_count:
+            raise DocumentError("Error: No text extracted from PDF")
         
         if verbose:
-            print(f"Processing chunk {chunk_num}/{total_chunks} (pages {i+1}-{i+len(chunk)})...", file=sys.stderr)
+            print(f"Extracted {page_count} pages into {len(futures)} chunks", file=sys.stderr)
         
-        # Combine pages in chunk
-        combined_text = "\n\n".join(chunk)
+        with metrics.stage("fabric_wait", record):
+            chunk_results = [future.result() for future in futures]
         
-        # Run fabric pattern on chunk
-        result = run_fabric_pattern(combined_text, pattern)
-        chunk_results.append(result)
+        # Aggregate all chunk results
+        with metrics.stage("aggregate", record):
+            output = aggregate_results(chunk_results, pattern, runner, fan_in, verbose, doc_journal)
+        
+        return output
+
+
+def process_batch(
+    pdf_paths: List[Path],
+    pattern: str,
+    runner: FabricRunner,
+    chunk_size: int = 1,
+    verbose: bool = False,
+    cache: Optional[ExtractionCache] = None,
+    fan_in: int = 0,
+    documents: int = 2,
+    extractor: Optional[PageExtractor] = None,
+    chunk_tokens: int = 0,
+    journal: Optional[FabricJournal] = None
+) -> Iterator[Tuple[Path, Optional[str], Optional[str]]]:
+    """
+    Process many PDFs through one shared fabric work queue.
     
-    if verbose:
-        print(f"Aggregating {len(chunk_results)} results...", file=sys.stderr)
+    Up to `documents` PDFs are extracted and chunked at a time, and all of their
+    chunk and aggregation calls share the runner's pool, so the global fabric
+    concurrency stays at the runner's limit. Yields (pdf_path, output, error)
+    in input order; a failed document yields its error and does not stop the
+    rest of the batch.
+    """
+    # Document coordinators must not run on the runner's pool: they block on it
+    with ThreadPoolExecutor(max_workers=max(1, documents)) as coordinators:
+        futures = [
+            coordinators.submit(
+                process_pdf_with_fabric,
+                pdf_path, pattern, chunk_size, verbose, cache, runner, fan_in, extractor, chunk_tokens, journal
+            )
+            for pdf_path in pdf_paths
+        ]
+        for pdf_path, future in zip(pdf_paths, futures):
+            try:
+                yield pdf_path, future.result(), None
+            except (DocumentError, FabricError) as e:
+                yield pdf_path, None, str(e)
+
+
+def expand_inputs(inputs: List[str]) -> List[Path]:
+    """Expand PDF files, directories and glob patterns into a list of PDF paths."""
+    pdf_paths = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            pdf_paths.extend(sorted(p for p in path.iterdir() if p.suffix.lower() == '.pdf'))
+        elif glob.has_magic(item):
+            pdf_paths.extend(sorted(Path(p) for p in glob.glob(item) if p.lower().endswith('.pdf')))
+        elif not path.exists():
+            print(f"Error: File not found: {path}", file=sys.stderr)
+            sys.exit(1)
+        elif not path.suffix.lower() == '.pdf':
+            print(f"Error: File is not a PDF: {path}", file=sys.stderr)
+            sys.exit(1)
+        else:
+            pdf_paths.append(path)
+    return pdf_paths
+
+
+def output_names(pdf_paths: List[Path]) -> dict:
+    """
+    Name each PDF's --output-dir file, exiting if two different PDFs would share one.
     
-    # Aggregate all chunk results
-    aggregated_text = "\n\n---\n\n".join(chunk_results)
-    final_result = run_fabric_pattern(aggregated_text, pattern)
+    A PDF writes <stem>.txt, unless another input has the same stem; then
+    both are named <parent directory>_<stem>.txt.
+    """
+    stems = {}
+    for pdf_path in dict.fromkeys(p.resolve() for p in pdf_paths):
+        stems.setdefault(pdf_path.stem, []).append(pdf_path)
     
-    return final_result
+    names = {}
+    owners = {}
+    for stem, paths in stems.items():
+        for pdf_path in paths:
+            name = f"{stem}.txt" if len(paths) == 1 else f"{pdf_path.parent.name}_{stem}.txt"
+            if name in owners:
+                print(f"Error: {owners[name]} and {pdf_path} would both be written to {name}", file=sys.stderr)
+                sys.exit(1)
+            owners[name] = pdf_path
+            names[pdf_path] = name
+    return {pdf_path: names[pdf_path.resolve()] for pdf_path in pdf_paths}
+
+
+def non_negative_int(value: str) -> int:
+    """argparse type for options that must be at least 0."""
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be at least 0, got {value}")
+    return number
+
+
+def positive_int(value: str) -> int:
+    """argparse type for options that must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
 
 
 def main():
@@ -118,13 +923,22 @@ Examples:
   %(prog)s document.pdf -p summarize
   %(prog)s report.pdf -p extract_wisdom -c 5 -v
   %(prog)s paper.pdf -p analyze_claims --chunk-size 3 -o output.txt
+  %(prog)s manual.pdf -p summarize --chunk-tokens 3000
+  %(prog)s guide.pdf -p summarize --parallel 8 --timeout 120 --retries 3
+  %(prog)s guide.pdf -p summarize --parallel 8 --fabric-url http://localhost:8080
+  %(prog)s manual.pdf -p summarize --parallel 8 --fan-in 4
+  %(prog)s onboarding-deck.pdf -p summarize --jobs 4 --split-pages 5
+  %(prog)s program-docs/ -p summarize --parallel 8 --output-dir summaries/
+  %(prog)s 'program-docs/*Form*.pdf' -p summarize --jsonl forms.jsonl
+  %(prog)s program-docs/ -p summarize --output-dir summaries/ --resume
         """
     )
     
     parser.add_argument(
-        "pdf_path",
-        type=Path,
-        help="Path to PDF file"
+        "inputs",
+        nargs="+",
+        metavar="pdf_path",
+        help="PDF file(s), directories of PDFs, or glob patterns"
     )
     
     parser.add_argument(
@@ -133,43 +947,286 @@ Examples:
         help="Fabric pattern to apply"
     )
     
+    parser.add_argument(
+        "-m", "--model",
+        help="Model for fabric to use (default: fabric's configured model)"
+    )
+    
     parser.add_argument(
         "-c", "--chunk-size",
-        type=int,
+        type=positive_int,
         default=1,
         help="Number of pages to process together (default: 1)"
     )
     
+    parser.add_argument(
+        "--chunk-tokens",
+        type=positive_int,
+        default=0,
+        metavar="N",
+        help="Instead of --chunk-size pages, pack pages into chunks of about N estimated tokens, "
+             "splitting longer pages at paragraph breaks"
+    )
+    
     parser.add_argument(
         "-o", "--output",
         type=Path,
         help="Output file (default: stdout)"
     )
     
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        help="Batch mode: write one <name>.txt output per document to this directory "
+             "(<parent>_<name>.txt where inputs from different directories share a name)"
+    )
+    
+    parser.add_argument(
+        "--jsonl",
+        type=Path,
+        help="Batch mode: write one JSON record per document to this file ('-' for stdout)"
+    )
+    
     parser.add_argument(
         "-v", "--verbose",
         action="store_true",
         help="Print progress information"
     )
     
+    parser.add_argument(
+        "-P", "--parallel",
+        type=int,
+        default=1,
+        help="Maximum concurrent fabric calls (default: 1)"
+    )
+    
+    parser.add_argument(
+        "--fabric-url",
+        metavar="URL",
+        help="Send calls to a running 'fabric --serve' REST server (e.g. http://localhost:8080) over "
+             "pooled keep-alive connections instead of starting fabric once per call"
+    )
+    
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes for PDF text extraction; long documents are split "
+             "into page ranges across them (default: 1, 0 = all CPUs)"
+    )
+    
+    parser.add_argument(
+        "--split-pages",
+        type=int,
+        default=DEFAULT_PAGES_PER_TASK,
+        metavar="N",
+        help=f"With --jobs, pages per extraction task (default: {DEFAULT_PAGES_PER_TASK})"
+    )
+    
+    parser.add_argument(
+        "--lazy-pages",
+        action="store_true",
+        help="Release each page's objects once its text is extracted (lower memory, a little slower)"
+    )
+    
+    parser.add_argument(
+        "--pages-dir",
+        metavar="DIR",
+        help="Read page texts from, and add newly parsed ones to, the page text directory shared "
+             "with the field extractor (see analysis/page_texts.py) instead of parsing with pypdf"
+    )
+    
+    parser.add_argument(
+        "--documents",
+        type=int,
+        default=2,
+        help="Batch mode: documents extracted and queued at once (default: 2)"
+    )
+    
+    parser.add_argument(
+        "-k", "--fan-in",
+        type=positive_int,
+        default=0,
+        help="Aggregate K results per call in a tree reduce (default: one final call)"
+    )
+    
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Per-call fabric timeout in seconds (default: none)"
+    )
+    
+    parser.add_argument(
+        "--retries",
+        type=non_negative_int,
+        default=2,
+        help="Retries for a failed or timed-out fabric call (default: 2)"
+    )
+    
+    parser.add_argument(
+        "--backoff",
+        type=float,
+        default=1.0,
+        help="Initial retry delay in seconds, doubled on each retry (default: 1.0)"
+    )
+    
+    parser.add_argument(
+        "--fabric-cache-dir",
+        default=DEFAULT_FABRIC_CACHE_DIR,
+        help=f"Fabric result cache directory (default: {DEFAULT_FABRIC_CACHE_DIR})"
+    )
+    
+    parser.add_argument(
+        "--fabric-cache-max-mb",
+        type=int,
+        default=DEFAULT_MAX_MB,
+        help=f"Evict least recently used fabric results beyond this size (default: {DEFAULT_MAX_MB})"
+    )
+    
+    parser.add_argument(
+        "--no-fabric-cache",
+        action="store_true",
+        help="Always call fabric instead of reusing cached results"
+    )
+    
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reuse the chunk and aggregation results journaled by an interrupted or failed run"
+    )
+    
+    parser.add_argument(
+        "--journal-dir",
+        default=DEFAULT_JOURNAL_DIR,
+        help=f"Directory for per-document result journals (default: {DEFAULT_JOURNAL_DIR})"
+    )
+    
+    parser.add_argument(
+        "--journal-max-mb",
+        type=int,
+        default=DEFAULT_JOURNAL_MAX_MB,
+        help=f"Evict least recently used journals beyond this size (default: {DEFAULT_JOURNAL_MAX_MB})"
+    )
+    
+    parser.add_argument(
+        "--no-journal",
+        action="store_true",
+        help="Don't journal results (a failed run can't be resumed)"
+    )
+    
+    add_cache_arguments(parser)
+    add_metrics_arguments(parser)
+    
     args = parser.parse_args()
     
-    if not args.pdf_path.exists():
-        print(f"Error: File not found: {args.pdf_path}", file=sys.stderr)
+    try:
+        pdf_reader_class()
+    except ImportError:
+        print("Error: pypdf is required. Install with: pip install pypdf", file=sys.stderr)
         sys.exit(1)
     
-    if not args.pdf_path.suffix.lower() == '.pdf':
-        print(f"Error: File is not a PDF: {args.pdf_path}", file=sys.stderr)
+    pdf_paths = expand_inputs(args.inputs)
+    # Anything that can name more than one PDF is a batch, even if it matched only one
+    batch = (
+        args.output_dir is not None
+        or args.jsonl is not None
+        or len(args.inputs) > 1
+        or len(pdf_paths) > 1
+        or Path(args.inputs[0]).is_dir()
+        or glob.has_magic(args.inputs[0])
+    )
+    
+    if not pdf_paths:
+        print("Error: No PDF files found", file=sys.stderr)
         sys.exit(1)
     
-    # Process the PDF
-    result = process_pdf_with_fabric(
-        args.pdf_path,
-        args.pattern,
-        args.chunk_size,
-        args.verbose
+    cache = cache_from_args(args)
+    result_cache = None
+    if not args.no_fabric_cache:
+        result_cache = ExtractionCache(args.fabric_cache_dir, args.fabric_cache_max_mb * 1024 * 1024)
+    
+    metrics = metrics_from_args(args, "pdf_fabric_processor")
+    server = None
+    if args.fabric_url:
+        try:
+            server = FabricServer(args.fabric_url, args.parallel, metrics)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        if not server.available():
+            print(f"Warning: no fabric server at {args.fabric_url}; running fabric once per call instead",
+                  file=sys.stderr)
+            server = None
+    
+    runner = FabricRunner(
+        args.parallel, args.timeout, args.retries, args.backoff, args.verbose, args.model, result_cache, metrics,
+        server
     )
     
+    journal = None
+    if not args.no_journal:
+        journal = FabricJournal(args.journal_dir, args.resume, args.journal_max_mb * 1024 * 1024)
+    
+    jobs = args.jobs or os.cpu_count()
+    page_texts = PageTexts(args.pages_dir) if args.pages_dir else None
+    extractor = None
+    if jobs > 1 or args.lazy_pages or page_texts is not None:
+        extractor = PageExtractor(jobs, args.split_pages, args.lazy_pages, page_texts)
+    
+    try:
+        if batch:
+            failures = run_batch(pdf_paths, args, runner, cache, extractor, journal)
+        else:
+            failures = run_single(pdf_paths[0], args, runner, cache, extractor, journal)
+    finally:
+        if extractor is not None:
+            extractor.close()
+    
+    if args.verbose:
+        if cache is not None:
+            print(f"Extraction cache: {cache.hits} hits, {cache.misses} misses", file=sys.stderr)
+        if result_cache is not None:
+            print(f"Fabric result cache: {result_cache.hits} hits, {result_cache.misses} misses", file=sys.stderr)
+    
+    metrics.record_cache("extraction", cache)
+    metrics.record_cache("fabric_result", result_cache)
+    finish_metrics(metrics, args)
+    
+    if journal is not None and journal.close():
+        print(f"Completed results are journaled in {args.journal_dir}; rerun with --resume to skip them",
+              file=sys.stderr)
+    
+    if failures:
+        sys.exit(1)
+
+
+def run_single(
+    pdf_path: Path,
+    args: argparse.Namespace,
+    runner: FabricRunner,
+    cache: Optional[ExtractionCache],
+    extractor: Optional[PageExtractor] = None,
+    journal: Optional[FabricJournal] = None
+) -> int:
+    """Process one PDF and write its output to --output or stdout; returns the failure count."""
+    try:
+        with runner:
+            result = process_pdf_with_fabric(
+                pdf_path,
+                args.pattern,
+                args.chunk_size,
+                args.verbose,
+                cache,
+                runner,
+                args.fan_in,
+                extractor,
+                args.chunk_tokens,
+                journal
+            )
+    except (DocumentError, FabricError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    
     # Output result
     if args.output:
         args.output.write_text(result)
@@ -177,6 +1234,58 @@ Examples:
             print(f"Output written to {args.output}", file=sys.stderr)
     else:
         print(result)
+    return 0
+
+
+def run_batch(
+    pdf_paths: List[Path],
+    args: argparse.Namespace,
+    runner: FabricRunner,
+    cache: Optional[ExtractionCache],
+    extractor: Optional[PageExtractor] = None,
+    journal: Optional[FabricJournal] = None
+) -> int:
+    """Process many PDFs, writing per-document files or JSONL; returns the failure count."""
+    if args.output_dir:
+        names = output_names(pdf_paths)
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+    
+    if args.output_dir is None and args.jsonl is None and args.output is not None:
+        args.jsonl = args.output
+    
+    if args.output_dir is not None:
+        jsonl = None
+    elif args.jsonl is None or str(args.jsonl) == "-":
+        jsonl = sys.stdout
+    else:
+        jsonl = open(args.jsonl, "w", encoding="utf-8")
+    
+    failures = 0
+    try:
+        with runner:
+            for pdf_path, result, error in process_batch(
+                pdf_paths, args.pattern, runner, args.chunk_size, args.verbose,
+                cache, args.fan_in, args.documents, extractor, args.chunk_tokens, journal
+            ):
+                if error is not None:
+                    failures += 1
+                    print(f"Failed: {pdf_path}: {error}", file=sys.stderr)
+                elif args.output_dir is not None:
+                    output_path = args.output_dir / names[pdf_path]
+                    output_path.write_text(result)
+                    if args.verbose:
+                        print(f"Output written to {output_path}", file=sys.stderr)
+                
+                if jsonl is not None:
+                    record = {"document": str(pdf_path), "pattern": args.pattern, "output": result, "error": error}
+                    jsonl.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    jsonl.flush()
+    finally:
+        if jsonl is not None and jsonl is not sys.stdout:
+            jsonl.close()
+    
+    print(f"Processed {len(pdf_paths) - failures}/{len(pdf_paths)} documents", file=sys.stderr)
+    return failures
 
 
 if __name__ == "__main__":
@@ -6,52 +6,237 @@ Creates CPF-specific form field database
 
 import os
 import sys
-sys.path.append('../analysis')
-
-# Import the extraction functions from the main script
-from pathlib import Path
 import csv
-import PyPDF2
-import re
-import hashlib
-from collections import defaultdict
+import json
+from pathlib import Path
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'analysis'))
+
+# The same extraction and enhancement functions as the analysis scripts
+from cpf_extraction import (
+    ENHANCER_VERSION, FIELD_PARSER_VERSION, NULL_METRICS, RAW_FIELDNAMES, add_cache_arguments,
+    add_dedup_arguments, add_metrics_arguments, cache_from_args, deduplicate_fields, enhance_csv,
+    enhance_row, extract_documents, extractor_version, file_digest, finish_metrics, iter_all_fields,
+    iter_unique_fields, metrics_from_args, print_enhancement_stats, write_enhanced_csv, write_merge_report
+)
+
+def load_manifest(manifest_path):
+    """Load the per-document manifest, discarding it if extractor versions changed"""
+    versions = {
+        'extractor': extractor_version(),
+        'field_parser': FIELD_PARSER_VERSION,
+        'enhancer': ENHANCER_VERSION
+    }
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = None
+    
+    if manifest is None or manifest.get('versions') != versions:
+        manifest = {'versions': versions, 'documents': {}}
+    return manifest
+
+def save_manifest(manifest, manifest_path):
+    """Atomically write the manifest"""
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
 
-# Use the same extraction functions as before
-exec(open('../analysis/extract_form_fields.py').read().replace('if __name__ == "__main__":', 'if False:'))
-exec(open('../analysis/enhance_form_fields.py').read().replace('if __name__ == "__main__":', 'if False:'))
+def update_incremental(pdf_dir, output_csv_raw, output_csv_enhanced, manifest_path,
+                       jobs=1, split_pages=0, cache=None, store=None, fuzzy=0, merge_report=None,
+                       lazy=False, page_texts=None, metrics=NULL_METRICS):
+    """Re-extract only added/changed PDFs and splice their rows into both CSVs
+    
+    The manifest records each document's mtime, size and SHA-256 along with
+    the raw and enhanced rows it produced before deduplication. Documents whose
+    mtime and size are unchanged (or whose hash still matches) reuse those rows;
+    deleted documents drop out. Deduplicating the spliced rows in sorted document
+    order reproduces exactly what a full run would write.
+    """
+    manifest = load_manifest(manifest_path)
+    documents = manifest['documents']
+    pdf_files = sorted(Path(pdf_dir).glob('*.pdf'))
+    
+    changed = []
+    manifest_dirty = False
+    for pdf_path in pdf_files:
+        stat = pdf_path.stat()
+        entry = documents.get(pdf_path.name)
+        if entry is not None and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+            continue
+        
+        digest = file_digest(pdf_path)
+        if entry is not None and entry['sha256'] == digest:
+            # Touched but not modified
+            entry['mtime'] = stat.st_mtime
+            entry['size'] = stat.st_size
+            manifest_dirty = True
+            continue
+        changed.append((pdf_path, stat, digest))
+    
+    deleted = set(documents) - {pdf_path.name for pdf_path in pdf_files}
+    for name in sorted(deleted):
+        print(f"Removed: {name}")
+        del documents[name]
+    
+    outputs_exist = os.path.exists(output_csv_raw) and os.path.exists(output_csv_enhanced)
+    # The stored rows are pre-deduplication, so a new --fuzzy setting only needs a re-splice
+    same_dedup = manifest.get('fuzzy', 0) == fuzzy and not merge_report
+    if not changed and not deleted and outputs_exist and same_dedup:
+        if manifest_dirty:
+            save_manifest(manifest, manifest_path)
+        if store is not None:
+            # The store may predate the CSV (e.g. the last run had no --db)
+            store.import_csv(output_csv_enhanced)
+        print(f"Up to date: {len(pdf_files)} documents unchanged")
+        return
+    
+    print(f"Found {len(changed)} added or changed PDF files to process...")
+    
+    stats = {pdf_path: (stat, digest) for pdf_path, stat, digest in changed}
+    changed_files = [c[0] for c in changed]
+    extracted = extract_documents(changed_files, jobs, split_pages, cache, lazy, page_texts, metrics)
+    for pdf_path, fields in metrics.iter_timed('extract', extracted):
+        if fields is None:
+            # Leave unreadable documents out of the manifest so they are retried
+            documents.pop(pdf_path.name, None)
+            continue
+        
+        stat, digest = stats[pdf_path]
+        # Enhance rows exactly as they would read back from the raw CSV
+        raw_rows = [{name: str(field[name]) for name in RAW_FIELDNAMES} for field in fields]
+        documents[pdf_path.name] = {
+            'mtime': stat.st_mtime,
+            'size': stat.st_size,
+            'sha256': digest,
+            'rows': raw_rows,
+            'enhanced_rows': list(metrics.iter_timed('enhance', (enhance_row(row) for row in raw_rows)))
+        }
+    
+    # Splice all documents back together in the order a full run processes them
+    all_rows = []
+    enhanced_by_row = {}
+    for pdf_path in pdf_files:
+        entry = documents.get(pdf_path.name)
+        if entry is None:
+            continue
+        for row, enhanced_row in zip(entry['rows'], entry['enhanced_rows']):
+            all_rows.append(row)
+            enhanced_by_row[id(row)] = enhanced_row
+    
+    merges = []
+    with metrics.stage('dedup'):
+        unique_rows = deduplicate_fields(all_rows, fuzzy, merges)
+    manifest['fuzzy'] = fuzzy
+    
+    print(f"\nTotal fields extracted: {len(all_rows)}")
+    print(f"Unique fields: {len(unique_rows)}")
+    if fuzzy:
+        print(f"Near-duplicates merged: {len(merges)}")
+        if merge_report:
+            write_merge_report(merges, merge_report)
+    
+    if unique_rows:
+        with metrics.stage('csv_write'):
+            with open(output_csv_raw, 'w', newline='', encoding='utf-8') as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=RAW_FIELDNAMES)
+                writer.writeheader()
+                writer.writerows(unique_rows)
+            
+            print(f"\n✓ Raw CSV created: {output_csv_raw}")
+            
+            enhanced_rows = (enhanced_by_row[id(row)] for row in unique_rows)
+            stats = write_enhanced_csv(enhanced_rows, output_csv_enhanced, store)
+        print_enhancement_stats(stats)
+    else:
+        print("\n⚠ No fields found to write to CSV")
+    
+    save_manifest(manifest, manifest_path)
 
-def main():
+def main(jobs=1, split_pages=0, cache=None, incremental=False, store=None, fuzzy=0, merge_report=None,
+         lazy=False, page_texts=None, metrics=NULL_METRICS):
     pdf_dir = os.path.dirname(os.path.abspath(__file__))
     output_csv_raw = os.path.join(pdf_dir, 'cpf_form_fields_raw.csv')
     output_csv_enhanced = os.path.join(pdf_dir, 'cpf_form_fields_enhanced.csv')
+    manifest_path = os.path.join(pdf_dir, 'cpf_form_fields_manifest.json')
     
     print("="*60)
     print("CPF Program - Form Field Extractor")
     print("="*60)
     
-    # Extract fields from CPF PDFs
-    all_fields = extract_all_forms(pdf_dir)
+    if incremental:
+        update_incremental(pdf_dir, output_csv_raw, output_csv_enhanced, manifest_path,
+                           jobs, split_pages, cache, store, fuzzy, merge_report, lazy, page_texts, metrics)
+        return
     
-    # Deduplicate
-    unique_fields = deduplicate_fields(all_fields)
+    # Extract, deduplicate and write fields as they stream in; the CSV is only
+    # replaced once we know it has rows
+    counts = {'total': 0, 'unique': 0}
+    merges = []
+    tmp_csv_raw = output_csv_raw + '.tmp'
+    fields = iter_all_fields(pdf_dir, jobs, split_pages, cache, lazy, page_texts, metrics)
+    unique_fields = metrics.iter_timed('dedup', iter_unique_fields(fields, counts, fuzzy, merges))
+    with metrics.stage('csv_write'), open(tmp_csv_raw, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=RAW_FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(unique_fields)
     
-    print(f"\nTotal fields extracted: {len(all_fields)}")
-    print(f"Unique fields: {len(unique_fields)}")
+    print(f"\nTotal fields extracted: {counts['total']}")
+    print(f"Unique fields: {counts['unique']}")
+    if fuzzy:
+        print(f"Near-duplicates merged: {len(merges)}")
+        if merge_report:
+            write_merge_report(merges, merge_report)
     
-    # Write raw CSV
-    if unique_fields:
-        with open(output_csv_raw, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['form_number', 'document', 'field_name', 'field_type', 'required', 'context']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(unique_fields)
-        
+    if counts['unique']:
+        os.replace(tmp_csv_raw, output_csv_raw)
         print(f"\n✓ Raw CSV created: {output_csv_raw}")
         
         # Enhance the CSV
-        enhance_csv(output_csv_raw, output_csv_enhanced)
+        enhance_csv(output_csv_raw, output_csv_enhanced, store, metrics)
     else:
+        os.remove(tmp_csv_raw)
         print("\n⚠ No fields found to write to CSV")
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Extract CPF form fields into raw and enhanced CSVs")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Worker processes for PDF extraction (default: 1, 0 = all CPUs)")
+    parser.add_argument("--split-pages", type=int, default=0, metavar="N",
+                        help="With --jobs, split documents longer than N pages across workers")
+    parser.add_argument("--lazy-pages", action="store_true",
+                        help="Release each page's objects once its text is extracted (lower memory, a little slower)")
+    parser.add_argument("--pages-dir", metavar="DIR",
+                        help="Read page texts from, and add newly parsed ones to, a shared page text "
+                             "directory (see analysis/page_texts.py)")
+    parser.add_argument("-i", "--incremental", action="store_true",
+                        help="Only re-extract added/changed PDFs, tracked in cpf_form_fields_manifest.json")
+    parser.add_argument("--db", action="store_true",
+                        help="Also load the enhanced fields into the indexed store cpf_form_fields.db")
+    add_dedup_arguments(parser)
+    add_cache_arguments(parser)
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    
+    store = None
+    if args.db:
+        from field_store import FieldStore
+        store = FieldStore(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cpf_form_fields.db'))
+    
+    page_texts = None
+    if args.pages_dir:
+        from page_texts import PageTexts
+        page_texts = PageTexts(args.pages_dir)
+    
+    metrics = metrics_from_args(args, 'extract_cpf_fields')
+    main(args.jobs or os.cpu_count(), args.split_pages, cache_from_args(args), args.incremental, store,
+         args.fuzzy, args.merge_report, args.lazy_pages, page_texts, metrics)
+    finish_metrics(metrics, args)
+    
+    if store is not None:
+        store.close()
+